@@ -14,4 +14,126 @@ import os
 # LLM Model to use
 MODEL_NAME = "gemini-2.5-pro"
 AGENT_NAME = "product_curation"
-DESCRIPTION = "A helpful assistant for curating GCP products based on guidelines and user feedback."
\ No newline at end of file
+DESCRIPTION = "A helpful assistant for curating GCP products based on guidelines and user feedback."
+
+# AlloyDB connection pool (shared by all guideline lookups in the process)
+ALLOYDB_POOL_MAX_SIZE = int(os.getenv("ALLOYDB_POOL_MAX_SIZE", "10"))
+ALLOYDB_POOL_IDLE_TIMEOUT = float(os.getenv("ALLOYDB_POOL_IDLE_TIMEOUT", "300"))  # seconds
+ALLOYDB_POOL_HEALTH_CHECK_AFTER = float(os.getenv("ALLOYDB_POOL_HEALTH_CHECK_AFTER", "30"))  # seconds
+ALLOYDB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("ALLOYDB_POOL_ACQUIRE_TIMEOUT", "30"))  # seconds
+
+# Guideline search: worker threads for the blocking retrieval path and per-call timeout
+GUIDELINE_SEARCH_WORKERS = int(os.getenv("GUIDELINE_SEARCH_WORKERS", str(ALLOYDB_POOL_MAX_SIZE)))
+GUIDELINE_SEARCH_TIMEOUT = float(os.getenv("GUIDELINE_SEARCH_TIMEOUT", "60"))  # seconds
+
+# Query-embedding cache (set EMBEDDING_CACHE_PATH to persist vectors in SQLite across runs)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH") or None
+
+# Bulk guideline ingestion
+GUIDELINE_DOCS_DIR = os.getenv(
+    "GUIDELINE_DOCS_DIR",
+    os.path.join(os.path.dirname(__file__), "subagents", "discovery", "docs"),
+)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # Gemini batchEmbedContents limit
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "4"))
+
+# Guideline vector index: "hnsw" or "ivfflat". Build parameters are derived from the row count.
+GUIDELINE_INDEX_TYPE = os.getenv("GUIDELINE_INDEX_TYPE", "hnsw")
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))  # floor; raised to 4 * top_k per query
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "0"))  # 0 = sqrt(lists)
+REINDEX_AFTER_INGEST = os.getenv("REINDEX_AFTER_INGEST", "true").lower() == "true"
+
+# Guideline search mode: "hybrid" (full-text + vector, reciprocal rank fusion) or "vector"
+GUIDELINE_SEARCH_MODE = os.getenv("GUIDELINE_SEARCH_MODE", "hybrid")
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "5"))  # candidates per retriever = top_k * this
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Filtered guideline search: over-fetch factor for ef_search / probes when pgvector lacks iterative scans
+FILTER_OVERFETCH = int(os.getenv("FILTER_OVERFETCH", "4"))
+
+# Micro-batching of concurrent query embeddings into one embed_documents call
+EMBEDDING_MICROBATCH = os.getenv("EMBEDDING_MICROBATCH", "true").lower() == "true"
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "15"))
+
+# Guideline retrieval backend: "alloydb" or "local" (memory-mapped NumPy index, no database)
+GUIDELINE_BACKEND = os.getenv("GUIDELINE_BACKEND", "alloydb")
+LOCAL_GUIDELINE_INDEX_PATH = os.getenv(
+    "LOCAL_GUIDELINE_INDEX_PATH",
+    os.path.join(GUIDELINE_DOCS_DIR, "index"),
+)
+
+# ANN index storage: "full" (vector), "halfvec" or "bit" (binary-quantized). Quantized indexes
+# fetch top_k * RERANK_FACTOR candidates, re-ranked by full-precision distance.
+GUIDELINE_VECTOR_STORAGE = os.getenv("GUIDELINE_VECTOR_STORAGE", "full")
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "4"))
+
+# Token budget for a single guideline tool response (per query), after merging/de-duplication
+GUIDELINE_RESPONSE_MAX_TOKENS = int(os.getenv("GUIDELINE_RESPONSE_MAX_TOKENS", "1500"))
+
+# Guideline chunking: token-sized, section/sentence-aware chunks. CHUNK_TOKENIZER is "gemini"
+# (local Gemini tokenizer when google-genai provides it) or "estimate" (~4 chars/token)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "gemini")
+
+# Shared HTTP client for the web tools (search / read_webpage); timeouts in seconds
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))  # wait for a free pooled connection
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP2 = os.getenv("HTTP2", "true").lower() == "true"
+
+# Web search result cache (set SEARCH_CACHE_PATH to persist results in SQLite across runs)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))  # seconds
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH") or None
+
+# Disk-backed page cache for read_webpage (set PAGE_CACHE_PATH="" to disable). Pages younger than
+# PAGE_CACHE_FRESH_TTL are served without a request; older ones are revalidated with a conditional GET.
+PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "product_curation", "pages.sqlite"),
+)
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_CACHE_FRESH_TTL = float(os.getenv("PAGE_CACHE_FRESH_TTL", "3600"))  # seconds
+
+# HTML extraction for read_webpage: "auto" (fastest installed), "selectolax", "lxml" or "bs4"
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "auto")
+HTML_EXTRACT_WORKERS = int(os.getenv("HTML_EXTRACT_WORKERS", "4"))
+
+# read_webpage streaming fetch: byte cap per page and accepted Content-Type prefixes
+READ_WEBPAGE_MAX_BYTES = int(os.getenv("READ_WEBPAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+READ_WEBPAGE_CONTENT_TYPES = tuple(
+    t.strip().lower()
+    for t in os.getenv("READ_WEBPAGE_CONTENT_TYPES", "text/html,application/xhtml+xml,text/plain").split(",")
+    if t.strip()
+)
+READ_WEBPAGE_QUERY_MAX_TOKENS = int(os.getenv("READ_WEBPAGE_QUERY_MAX_TOKENS", "1500"))  # default budget with `query`
+
+# Upstream rate limits shared by all agents in the process (QPS <= 0 = unlimited, concurrency 0 = uncapped)
+SEARCH_API_QPS = float(os.getenv("SEARCH_API_QPS", "5"))
+SEARCH_API_CONCURRENCY = int(os.getenv("SEARCH_API_CONCURRENCY", "4"))
+WEB_FETCH_QPS = float(os.getenv("WEB_FETCH_QPS", "20"))
+WEB_FETCH_CONCURRENCY = int(os.getenv("WEB_FETCH_CONCURRENCY", "16"))
+EMBEDDING_API_QPS = float(os.getenv("EMBEDDING_API_QPS", "10"))
+EMBEDDING_API_CONCURRENCY = int(os.getenv("EMBEDDING_API_CONCURRENCY", "4"))
+LLM_QPS = float(os.getenv("LLM_QPS", "2"))
+# Retries of 429 / 5xx / network errors: exponential backoff with full jitter, Retry-After honoured
+UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "4"))
+UPSTREAM_BACKOFF_BASE = float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"))  # seconds
+UPSTREAM_BACKOFF_MAX = float(os.getenv("UPSTREAM_BACKOFF_MAX", "30"))  # seconds
+
+# Research prefetch before the discovery fan-out: official pages read and digest size per page
+RESEARCH_PREFETCH = os.getenv("RESEARCH_PREFETCH", "true").lower() == "true"
+PREFETCH_MAX_PAGES = int(os.getenv("PREFETCH_MAX_PAGES", "4"))
+PREFETCH_PAGE_MAX_TOKENS = int(os.getenv("PREFETCH_PAGE_MAX_TOKENS", "600"))
+
+# Size bounds of each discovery sub-agent's finding handed to ReportAgent
+FINDING_SUMMARY_MAX_CHARS = int(os.getenv("FINDING_SUMMARY_MAX_CHARS", "1500"))
+FINDING_MAX_ITEMS = int(os.getenv("FINDING_MAX_ITEMS", "8"))  # key_points / concerns each
+FINDING_ITEM_MAX_CHARS = int(os.getenv("FINDING_ITEM_MAX_CHARS", "300"))
+FINDING_MAX_SOURCES = int(os.getenv("FINDING_MAX_SOURCES", "8"))
@@ -1,8 +1,11 @@
 from google.adk.agents.llm_agent import Agent,LlmAgent
 from product_curation import config
 from ...tools.my_agent_tools import MyAgentTools
-from product_curation.tools import guideline_search_tool
+from product_curation.tools.guideline_search_tool import guideline_search_tool, guideline_batch_search_tool
+from product_curation.tools.rate_limit import throttle_llm
 from . import prompt
+from .findings import FindingsMergeAgent, prepare_revision, store_finding
+from .prefetch import ResearchPrefetchAgent
 import logging
 from google.adk.agents import LlmAgent, BaseAgent
 from google.adk.agents import ParallelAgent,SequentialAgent
@@ -19,8 +22,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Identifies and summarizes high-level features of the product being assessed, focusing on aspects relevant to enterprise use and organizational standards.",
         instruction=prompt.feature_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="features",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="features",
+        after_agent_callback=store_finding,
     )
 
     limitations_agent = LlmAgent(
@@ -28,8 +33,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Identifies limitations and constraints of the product, especially those impacting security, compliance, data residency, networking, and compatibility with enterprise tooling.",
         instruction=prompt.limitations_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="limitations",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="limitations",
+        after_agent_callback=store_finding,
     )
 
     cmek_agent = LlmAgent(
@@ -37,8 +44,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Assesses CMEK (Customer Managed Encryption Key) capabilities and their alignment with organizational security and compliance requirements.",
         instruction=prompt.cmek_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="cmek",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="cmek",
+        after_agent_callback=store_finding,
     )
 
     data_residency_agent = LlmAgent(
@@ -46,8 +55,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Evaluates data residency options and compliance, considering organizational policies and regulatory requirements.",
         instruction=prompt.data_residency_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="data_residency",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="data_residency",
+        after_agent_callback=store_finding,
     )
 
     security_compliance_agent = LlmAgent(
@@ -55,8 +66,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Reviews security, compliance, and custom organization constraints, focusing on preventative compliance and alignment with GCP custom org policies.",
         instruction=prompt.security_compliance_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="security_compliance",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="security_compliance",
+        after_agent_callback=store_finding,
     )
 
     iac_agent = LlmAgent(
@@ -64,8 +77,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Assesses Infrastructure as Code (IAC) support and suggests alternative solutions that align with organizational standards if native IAC is not available.",
         instruction=prompt.iac_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="iac",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="iac",
+        after_agent_callback=store_finding,
     )
 
     network_agent = LlmAgent(
@@ -73,8 +88,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Reviews network and connectivity requirements or capabilities, including architecture, interconnect options, and compatibility with enterprise networking standards.",
         instruction=prompt.network_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="network",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="network",
+        after_agent_callback=store_finding,
     )
 
     interconnect_agent = LlmAgent(
@@ -82,8 +99,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Assesses interconnect usage and options, considering organizational constraints and best practices.",
         instruction=prompt.interconnect_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="interconnect",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="interconnect",
+        after_agent_callback=store_finding,
     )
 
     resilience_agent = LlmAgent(
@@ -91,8 +110,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Strictly assesses Google Cloud product resiliency capabilities, focusing only on supported features such as high availability, scalability, disaster recovery, and business continuity as documented by Google Cloud. Avoids speculation or unsupported claims.",
         instruction=prompt.resilience_instruction,
+        before_model_callback=throttle_llm,
         tools=[shared_tools],
-        # output_key="resilience",
+        output_key="resilience",
+        after_agent_callback=store_finding,
     )
 
     iam_agent = LlmAgent(
@@ -100,8 +121,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Reviews IAM requirements and capabilities, focusing on identity, authentication, and access management as per organizational standards.",
         instruction=prompt.iam_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="iam",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="iam",
+        after_agent_callback=store_finding,
     )
 
     vpcsc_agent = LlmAgent(
@@ -109,8 +132,10 @@ def build_agents():
         model=config.MODEL_NAME,
         description="Strictly assesses Google Cloud VPC-SC (Virtual Private Cloud Service Controls) capabilities, focusing only on supported features, configuration options, limitations, and compliance as documented by Google Cloud. Avoids speculation or unsupported claims.",
         instruction=prompt.vpcsc_instruction,
-        tools=[shared_tools, guideline_search_tool],
-        # output_key="vpc_sc",
+        before_model_callback=throttle_llm,
+        tools=[shared_tools, guideline_search_tool, guideline_batch_search_tool],
+        output_key="vpc_sc",
+        after_agent_callback=store_finding,
     )
 
     report_agent = LlmAgent(
@@ -118,6 +143,11 @@ def build_agents():
         name="ReportAgent",
         description="Compiles all sub-agent outputs into one discovery report.",
         instruction=prompt.REPORT_INSTRUCTION,
+        before_model_callback=throttle_llm,
+        # Works from the merged, compact findings in state, not the sub-agents' conversation history
+        include_contents="none",
+        # ...plus, on a [FEEDBACK] turn, the feedback and previous draft (see prepare_revision)
+        before_agent_callback=prepare_revision,
         output_key="product_assessment_template"
     )
 
@@ -133,11 +163,24 @@ def build_agents():
         ]
     )
 
-    # --- Sequential pipeline: run discovery first, then report ---
+    # Deterministic merge of the per-agent findings (de-duplicated sources) for the report
+    findings_merge_agent = FindingsMergeAgent(
+        name="FindingsMergeAgent",
+        description="Merges the discovery sub-agents' findings into one compact record for the report.",
+    )
+
+    # Deterministic prefetch of the core docs, shared by every discovery sub-agent via state
+    prefetch_agent = ResearchPrefetchAgent(
+        name="ResearchPrefetchAgent",
+        description="Searches and reads the core product documentation once, before the parallel discovery.",
+        toolset=shared_tools,
+    )
+
+    # --- Sequential pipeline: prefetch, run discovery, merge findings, then report ---
     orchestrator_agent = SequentialAgent(
         name="DiscoveryOrchestrator",
         description="Runs discovery in parallel first, then compiles into final report.",
-        sub_agents=[discovery_root_agent, report_agent],
+        sub_agents=([prefetch_agent] if config.RESEARCH_PREFETCH else []) + [discovery_root_agent, findings_merge_agent, report_agent],
     )
 
     return orchestrator_agent, shared_tools
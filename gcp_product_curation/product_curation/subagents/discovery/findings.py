@@ -0,0 +1,202 @@
+# findings.py
+"""
+Compact, typed hand-off from the discovery sub-agents to ReportAgent.
+
+Each sub-agent writes its final answer to its own output_key; `store_finding` (its
+after_agent_callback) parses that answer into a size-bounded DiscoveryFinding and
+replaces the raw text in state with it. FindingsMergeAgent then combines all findings
+into one `discovery_findings` record with de-duplicated sources, which is the only
+discovery input ReportAgent sees (it runs with include_contents="none"). On a feedback
+turn `prepare_revision` adds the reviewer's feedback and the previous draft.
+"""
+import json
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from pydantic import BaseModel, Field
+
+from product_curation import config
+
+# Sub-agent name -> state key holding its finding
+FINDING_KEYS = {
+    "feature_agent": "features",
+    "limitations_agent": "limitations",
+    "cmek_agent": "cmek",
+    "data_residency_agent": "data_residency",
+    "security_compliance_agent": "security_compliance",
+    "iac_agent": "iac",
+    "network_agent": "network",
+    "interconnect_agent": "interconnect",
+    "resilience_agent": "resilience",
+    "iam_agent": "iam",
+    "vpcsc_agent": "vpc_sc",
+}
+
+_URL = re.compile(r"https?://[^\s)\]}>\"'`,]+")
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+class Source(BaseModel):
+    url: str
+    title: Optional[str] = None
+
+
+class DiscoveryFinding(BaseModel):
+    area: str
+    summary: str = ""
+    key_points: List[str] = Field(default_factory=list)
+    concerns: List[str] = Field(default_factory=list)
+    sources: List[Source] = Field(default_factory=list)
+    truncated: bool = False
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " …"
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip().rstrip(".,;"))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", parts.query, ""))
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Models sometimes answer a list field with a single string or object."""
+    if value is None or value == "":
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _sources(raw: Any) -> List[Source]:
+    sources = []
+    for item in _as_list(raw):
+        if isinstance(item, str):
+            sources.extend(Source(url=u) for u in _URL.findall(item))
+        elif isinstance(item, dict) and (item.get("url") or item.get("link")):
+            sources.append(Source(url=item.get("url") or item.get("link"), title=item.get("title")))
+    return sources
+
+
+def _load_json(text: str) -> Optional[Dict[str, Any]]:
+    text = _FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def dedupe_sources(sources: List[Source]) -> List[Source]:
+    """Drop repeated URLs (normalised), keeping the first title seen."""
+    seen: Dict[str, Source] = {}
+    for s in sources:
+        key = normalize_url(s.url)
+        if key not in seen:
+            seen[key] = s
+        elif not seen[key].title and s.title:
+            seen[key] = Source(url=seen[key].url, title=s.title)
+    return list(seen.values())
+
+
+def parse_finding(area: str, output: Any) -> DiscoveryFinding:
+    """
+    Parse a sub-agent's final answer (JSON as requested by the prompt, or free text) into a
+    DiscoveryFinding bounded by config.FINDING_* limits.
+    """
+    if isinstance(output, dict):
+        data = output
+    else:
+        data = _load_json(str(output or "")) or {"summary": str(output or ""), "sources": _URL.findall(str(output or ""))}
+
+    max_items, item_chars = config.FINDING_MAX_ITEMS, config.FINDING_ITEM_MAX_CHARS
+    summary = str(data.get("summary") or "")
+    key_points = [str(p) for p in _as_list(data.get("key_points"))]
+    concerns = [str(c) for c in _as_list(data.get("concerns"))]
+    sources = dedupe_sources(_sources(data.get("sources")))
+
+    truncated = (len(summary) > config.FINDING_SUMMARY_MAX_CHARS or len(key_points) > max_items
+                 or len(concerns) > max_items or len(sources) > config.FINDING_MAX_SOURCES)
+    return DiscoveryFinding(
+        area=area,
+        summary=_clip(summary, config.FINDING_SUMMARY_MAX_CHARS),
+        key_points=[_clip(p, item_chars) for p in key_points[:max_items]],
+        concerns=[_clip(c, item_chars) for c in concerns[:max_items]],
+        sources=sources[:config.FINDING_MAX_SOURCES],
+        truncated=truncated,
+    )
+
+
+def store_finding(callback_context: CallbackContext):
+    """after_agent_callback: replace the agent's raw output in state with its compact finding."""
+    key = FINDING_KEYS.get(callback_context.agent_name)
+    if key is None:
+        return None
+    raw = callback_context.state.get(key)
+    if raw is not None:
+        callback_context.state[key] = parse_finding(key, raw).model_dump()
+    return None
+
+
+def _user_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    parts = getattr(content, "parts", None) or []
+    return "\n".join(p.text for p in parts if getattr(p, "text", None)).strip()
+
+
+def prepare_revision(callback_context: CallbackContext):
+    """
+    before_agent_callback for ReportAgent: it runs with include_contents="none", so the HITL
+    loop's `[FEEDBACK: ...]` message and the previous draft are handed over in state as
+    `report_revision` (empty for a first draft).
+    """
+    text = _user_text(callback_context)
+    previous = callback_context.state.get("product_assessment_template")
+    if text.upper().startswith("[FEEDBACK") and previous:
+        callback_context.state["report_revision"] = (
+            "Revise the previous report below according to the reviewer's feedback; "
+            "keep everything the feedback does not ask to change.\n\n"
+            f"Reviewer feedback:\n{text}\n\nPrevious report:\n{previous}"
+        )
+    else:
+        callback_context.state["report_revision"] = ""
+    return None
+
+
+class FindingsMergeAgent(BaseAgent):
+    """Deterministic merge of the per-agent findings into `discovery_findings` (no LLM call)."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        findings, all_sources = [], []
+        for key in FINDING_KEYS.values():
+            value = state.get(key)
+            if value is None:
+                continue
+            finding = DiscoveryFinding(**value) if isinstance(value, dict) and "area" in value else parse_finding(key, value)
+            all_sources.extend(finding.sources)
+            findings.append(finding.model_dump(exclude={"sources"}) | {
+                "sources": [s.url for s in finding.sources],
+            })
+
+        merged = {
+            "product_name": state.get("product_name"),
+            "findings": findings,
+            "missing_areas": [k for k in FINDING_KEYS.values() if state.get(k) is None],
+            "sources": [s.model_dump(exclude_none=True) for s in dedupe_sources(all_sources)],
+        }
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={
+                "discovery_findings": json.dumps(merged, separators=(",", ":"), ensure_ascii=False),
+            }),
+        )
@@ -0,0 +1,114 @@
+# prefetch.py
+"""
+Deterministic (non-LLM) research prefetch that runs before the parallel discovery fan-out.
+
+Every discovery sub-agent starts by searching for and reading the same core pages about
+{product_name}. ResearchPrefetchAgent does that once: it runs the core searches
+concurrently, reads the best official pages concurrently, and writes a bounded digest
+(title, link, section anchors, opening text) to session state as `research_prefetch`,
+which the sub-agent prompts include. The calls go through the toolset's public `search` /
+`read` helpers, i.e. the same session memo, caches and rate limits as the tools, so a
+sub-agent that still calls search / read_webpage for them gets an instant answer.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Dict, List
+from urllib.parse import urlparse
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.tools.tool_context import ToolContext
+
+from product_curation import config
+from product_curation.tools.passage_select import truncate_text
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_QUERIES = (
+    "{product} overview documentation",
+    "{product} release notes",
+    "{product} pricing",
+    "{product} quotas and limits",
+)
+OFFICIAL_HOSTS = ("cloud.google.com",)
+
+
+def _is_official(url: str) -> bool:
+    host = urlparse(url).netloc.lower()
+    return any(host == h or host.endswith("." + h) for h in OFFICIAL_HOSTS)
+
+
+class ResearchPrefetchAgent(BaseAgent):
+    """Gathers the core documentation set for the product into session state (no LLM calls)."""
+
+    toolset: Any  # MyAgentTools; its search / read_webpage tools (and their caches) are reused
+    max_pages: int = config.PREFETCH_MAX_PAGES
+    page_max_tokens: int = config.PREFETCH_PAGE_MAX_TOKENS
+
+    async def _search_all(self, product: str, tool_context: ToolContext) -> List[List[Dict[str, Any]]]:
+        results = await asyncio.gather(
+            *(self.toolset.search(q.format(product=product), tool_context) for q in PREFETCH_QUERIES),
+            return_exceptions=True,
+        )
+        hits = []
+        for query, result in zip(PREFETCH_QUERIES, results):
+            if isinstance(result, Exception):
+                logger.warning("Prefetch search %r failed: %s", query, result)
+                continue
+            hits.append(result)
+        return hits
+
+    def _pick_urls(self, hits: List[List[Dict[str, Any]]]) -> List[str]:
+        """Top official hit of each query first, then the remaining official hits by rank."""
+        urls: List[str] = []
+        ranked = [[h["link"] for h in result if h.get("link") and _is_official(h["link"])] for result in hits]
+        for rank in range(max((len(r) for r in ranked), default=0)):
+            for result in ranked:
+                if rank < len(result) and result[rank] not in urls:
+                    urls.append(result[rank])
+        return urls[:self.max_pages]
+
+    def _digest(self, content: Dict[str, Any]) -> str:
+        text = content.get("text") or ""
+        opening = truncate_text(text, self.page_max_tokens) or text
+        lines = [f"### {content.get('title') or content.get('url')}", f"Source: {content.get('url')}"]
+        anchors = [
+            f"{s['heading']} ({content.get('url', '').split('#')[0]}#{s['anchor']})"
+            for s in content.get("sections") or []
+            if s.get("heading") and s.get("anchor")
+        ]
+        if anchors:
+            lines.append("Sections: " + "; ".join(anchors[:20]))
+        if content.get("truncated"):
+            lines.append("(page was larger than the fetch limit; text is partial)")
+        lines.append(opening)
+        return "\n".join(lines)
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        product = ctx.session.state.get("product_name")
+        digest = "No prefetched documentation available."
+        # Calls go through the toolset's session memo; its state writes are emitted below
+        tool_context = ToolContext(ctx)
+        if product:
+            hits = await self._search_all(str(product), tool_context)
+            urls = self._pick_urls(hits)
+            pages = await asyncio.gather(
+                *(self.toolset.read(url, tool_context) for url in urls),
+                return_exceptions=True,
+            )
+            digests = []
+            for url, page in zip(urls, pages):
+                if isinstance(page, Exception):
+                    logger.warning("Prefetch read of %s failed: %s", url, page)
+                    continue
+                digests.append(self._digest(page))
+            if digests:
+                digest = "\n\n".join(digests)
+
+        yield Event(
+            author=self.name,
+            invocation_id=ctx.invocation_id,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={**tool_context.actions.state_delta, "research_prefetch": digest}),
+        )
@@ -0,0 +1,232 @@
+# alloydb_pool.py
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+import pg8000
+from dotenv import load_dotenv
+
+from product_curation import config
+
+load_dotenv()  # Load environment variables from .env
+
+
+class AlloyDBPool:
+    """
+    Thread-safe pg8000 connection pool shared by every guideline lookup in the process.
+
+    Pooled connections run in autocommit mode so a read costs a single round trip;
+    use `transaction()` for writes that must be atomic. Connections that sat idle
+    longer than `health_check_after` are pinged before reuse, connections idle longer
+    than `idle_timeout` are closed, and at most `max_size` are open at once.
+    """
+
+    def __init__(self, connect_kwargs: Dict[str, Any],
+                 max_size: int = 10,
+                 idle_timeout: float = 300.0,
+                 health_check_after: float = 30.0,
+                 acquire_timeout: float = 30.0):
+        self._connect_kwargs = connect_kwargs
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = deque()  # (conn, last_used) pairs, most recently used on the right
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._bootstrapped = False
+        self._bootstrap_lock = threading.Lock()
+
+    # --- Connection lifecycle ---
+
+    def _open(self):
+        conn = pg8000.connect(**self._connect_kwargs)
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self, now: float) -> list:
+        """Pop connections idle past idle_timeout; caller closes them outside the lock."""
+        stale = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            stale.append(self._idle.popleft()[0])
+        return stale
+
+    def acquire(self):
+        """Check out a connection, opening a new one if the pool is below max_size."""
+        deadline = time.monotonic() + self.acquire_timeout
+        conn, last_used = None, None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("AlloyDB pool is closed.")
+                now = time.monotonic()
+                stale = self._evict_idle_locked(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.max_size:
+                    self._in_use += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out waiting for an AlloyDB connection (max_size={self.max_size})."
+                    )
+                self._cond.wait(remaining)
+
+        for s in stale:
+            self._close_quietly(s)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self.health_check_after:
+                if not self._is_healthy(conn):
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """Return a connection to the pool, or close it if it may be broken."""
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                to_close = conn
+            else:
+                self._idle.append((conn, time.monotonic()))
+                to_close = None
+            self._cond.notify()
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+    @contextmanager
+    def connection(self):
+        """Borrow an autocommit connection for the duration of the block."""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except pg8000.InterfaceError:
+            # Network / protocol failure: the socket can't be trusted anymore.
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection and run the block inside a single transaction."""
+        with self.connection() as conn:
+            conn.autocommit = False
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                conn.autocommit = True
+
+    # --- One-time setup / teardown ---
+
+    def bootstrap(self, setup: Callable[[Any], None]) -> bool:
+        """
+        Run `setup(conn)` once per pool (e.g. schema DDL). A failed bootstrap is
+        retried on the next call instead of being cached.
+        """
+        if self._bootstrapped:
+            return True
+        with self._bootstrap_lock:
+            if self._bootstrapped:
+                return True
+            with self.transaction() as conn:
+                setup(conn)
+            self._bootstrapped = True
+        return True
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"idle": len(self._idle), "in_use": self._in_use, "max_size": self.max_size}
+
+
+# --- Process-wide pool ---
+
+_pool: Optional[AlloyDBPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> AlloyDBPool:
+    """Return the process-wide AlloyDB pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AlloyDBPool(
+                    connect_kwargs={
+                        "user": os.getenv("ALLOYDB_USER"),
+                        "password": os.getenv("ALLOYDB_PASS"),
+                        "database": os.getenv("ALLOYDB_NAME"),
+                        "host": os.getenv("ALLOYDB_HOST"),
+                        "port": int(os.getenv("ALLOYDB_PORT", "5432")),
+                    },
+                    max_size=config.ALLOYDB_POOL_MAX_SIZE,
+                    idle_timeout=config.ALLOYDB_POOL_IDLE_TIMEOUT,
+                    health_check_after=config.ALLOYDB_POOL_HEALTH_CHECK_AFTER,
+                    acquire_timeout=config.ALLOYDB_POOL_ACQUIRE_TIMEOUT,
+                )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(close_pool)
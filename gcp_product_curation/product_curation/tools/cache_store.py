@@ -0,0 +1,133 @@
+# cache_store.py
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, NFKC-normalise and collapse whitespace (the key form shared by the caches)."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class LruTtlStore(Generic[V]):
+    """
+    Thread-safe key → value store with LRU eviction and an optional TTL.
+
+    When `path` is given, entries are also persisted in a SQLite table (values go
+    through `encode` / `decode`) so they survive process restarts; a disk hit is
+    promoted back into memory. Expired entries are treated as misses and deleted, and
+    the table is trimmed to `max_entries` (oldest first) on every write.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, path: Optional[str] = None,
+                 table: str = "entries", encode: Callable[[V], Any] = lambda v: v,
+                 decode: Callable[[Any], V] = lambda v: v):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.table = table
+        self._encode = encode
+        self._decode = decode
+        self._entries: "OrderedDict[str, Tuple[V, float]]" = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_stored_at_idx ON {table} (stored_at)")
+            self._db.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """True when lookups may touch SQLite (callers on an event loop should use a thread)."""
+        return self._db is not None
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _remember_locked(self, key: str, value: V, stored_at: float):
+        self._entries[key] = (value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[V]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        value = self._decode(row[0])
+                        self._remember_locked(key, value, row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._db.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: V):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, V]]):
+        now = time.time()
+        with self._lock:
+            rows = []
+            for key, value in items:
+                self._remember_locked(key, value, now)
+                rows.append((key, self._encode(value), now))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)", rows
+                )
+                self._evict_disk_locked(now)
+                self._db.commit()
+
+    def _evict_disk_locked(self, now: float):
+        """Drop expired rows, then the oldest rows beyond max_entries, so the file stays bounded."""
+        if self.ttl is not None:
+            self._db.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (now - self.ttl,))
+        excess = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY stored_at LIMIT ?)", (excess,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
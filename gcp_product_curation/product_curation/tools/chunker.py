@@ -0,0 +1,181 @@
+# chunker.py
+"""
+Streaming, structure-aware chunking for guideline documents.
+
+Lines are consumed lazily (so large files never need to be held as one string),
+grouped into sections by their headings, split into sentences, and packed into
+chunks sized by token count. Each chunk carries the title of the section it came
+from (which is prepended to the text that gets embedded, see `titled_text`), and
+consecutive chunks within a section overlap by whole sentences.
+"""
+import re
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+from .result_postprocess import CHARS_PER_TOKEN, estimate_tokens
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.*\S)\s*$")
+_BULLET = re.compile(r"^\s*([-*•]|\d+[.)])\s+")
+
+
+class Chunk(NamedTuple):
+    text: str
+    section_title: Optional[str]
+    tokens: int
+
+
+def get_token_counter(tokenizer: str = "gemini", model_name: str = "gemini-2.5-pro") -> Callable[[str], int]:
+    """
+    Token counter for chunk sizing. "gemini" uses the local Gemini tokenizer when
+    google-genai ships it (and its sentencepiece model can be loaded); anything else,
+    or a failed load, falls back to the ~4 chars/token estimate.
+    """
+    if tokenizer == "gemini":
+        try:
+            from google.genai.local_tokenizer import LocalTokenizer
+
+            local = LocalTokenizer(model_name=model_name)
+            local.count_tokens("warm-up")
+            return lambda text: local.count_tokens(text).total_tokens
+        except Exception as e:
+            print(f"⚠️ Gemini tokenizer unavailable ({e}); estimating chunk tokens from length")
+    return estimate_tokens
+
+
+def _heading(line: str) -> Optional[str]:
+    """Return the heading text if `line` is markdown heading markup."""
+    m = _MARKDOWN_HEADING.match(line)
+    return m.group(1) if m else None
+
+
+def _maybe_heading(line: str) -> bool:
+    """A short, capitalised, unpunctuated line: a heading only if body text follows it."""
+    words = line.split()
+    return (0 < len(words) <= 8 and not _BULLET.match(line)
+            and line[-1] not in ".:;,!?" and not any(c in line for c in ":,|")
+            and words[0][0].isupper())
+
+
+def iter_sections(lines: Iterable[str], max_paragraph_chars: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Yield (section_title, paragraph) pairs; a paragraph is a run of non-blank, non-heading
+    lines. A short candidate line becomes the section title only when the next non-blank
+    line is body text; otherwise it is kept as body text itself, so runs of short
+    statements (policy bullets without bullet markup) are never dropped.
+
+    With `max_paragraph_chars`, a longer paragraph is yielded in pieces (at line breaks),
+    so files without blank lines don't buffer a whole section.
+    """
+    title, paragraph, pending, size = None, [], None, 0
+    for raw in lines:
+        if max_paragraph_chars and size >= max_paragraph_chars and paragraph:
+            yield title, " ".join(paragraph)
+            paragraph, size = [], 0
+        line = raw.strip()
+        if not line:
+            if paragraph:
+                yield title, " ".join(paragraph)
+                paragraph, size = [], 0
+            continue
+
+        heading = _heading(line)
+        candidate = heading is None and _maybe_heading(line)
+        if pending is not None:
+            if heading is None and not candidate:
+                # Body text follows: the pending line was a heading
+                if paragraph:
+                    yield title, " ".join(paragraph)
+                    paragraph, size = [], 0
+                title = pending
+            else:
+                paragraph.append(pending)
+                size += len(pending)
+            pending = None
+
+        if heading is not None:
+            if paragraph:
+                yield title, " ".join(paragraph)
+                paragraph, size = [], 0
+            title = heading
+        elif candidate:
+            pending = line
+        else:
+            paragraph.append(line)
+            size += len(line)
+
+    if pending is not None:
+        paragraph.append(pending)
+    if paragraph:
+        yield title, " ".join(paragraph)
+
+
+def titled_text(text: str, section_title: Optional[str]) -> str:
+    """Chunk text as embedded and keyword-indexed: prefixed by its section title, if any."""
+    return f"{section_title}\n{text}" if section_title else text
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    return [s for s in _SENTENCE_BREAK.split(paragraph) if s]
+
+
+def iter_chunks(lines: Iterable[str], max_tokens: int = 400, overlap_tokens: int = 50,
+                count_tokens: Callable[[str], int] = estimate_tokens) -> Iterator[Chunk]:
+    """
+    Pack sentences into chunks of at most `max_tokens` without crossing section
+    boundaries. Sentences longer than `max_tokens` are split on word boundaries.
+    """
+    title: Optional[str] = None
+    sentences: List[tuple] = []  # (sentence, tokens)
+    total = 0
+
+    def flush():
+        text = " ".join(s for s, _ in sentences)
+        return Chunk(text, title, total)
+
+    # Paragraphs are buffered up to a few chunks' worth of text, never a whole file
+    for section_title, paragraph in iter_sections(lines, max_paragraph_chars=4 * max_tokens * CHARS_PER_TOKEN):
+        if section_title != title:
+            if sentences:
+                yield flush()
+            title, sentences, total = section_title, [], 0
+
+        for sentence in split_sentences(paragraph):
+            for piece in _split_long(sentence, max_tokens, count_tokens):
+                tokens = count_tokens(piece)
+                if sentences and total + tokens > max_tokens:
+                    yield flush()
+                    # Carry trailing sentences forward as overlap
+                    carried, carried_tokens = [], 0
+                    for s, t in reversed(sentences):
+                        if carried_tokens + t > overlap_tokens or carried_tokens + t + tokens > max_tokens:
+                            break
+                        carried.insert(0, (s, t))
+                        carried_tokens += t
+                    sentences, total = carried, carried_tokens
+                sentences.append((piece, tokens))
+                total += tokens
+
+    if sentences:
+        yield flush()
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    if count_tokens(sentence) <= max_tokens:
+        return [sentence]
+    pieces, current = [], []
+    for word in sentence.split():
+        if current and count_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def iter_file_chunks(path: str, max_tokens: int = 400, overlap_tokens: int = 50,
+                     count_tokens: Callable[[str], int] = estimate_tokens) -> Iterator[Chunk]:
+    """Stream chunks from a text file, reading it line by line."""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_chunks(f, max_tokens=max_tokens, overlap_tokens=overlap_tokens,
+                               count_tokens=count_tokens)
@@ -0,0 +1,102 @@
+# embedding_batcher.py
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched calls.
+
+    Callers block in `embed()`; a background thread collects requests that arrive within
+    `window` seconds of the first one (or until `max_batch` is reached), sends them as one
+    `embed_batch` call and fans the vectors back out. Up to `max_in_flight` batches run at
+    once, so a slow batch doesn't hold up the next window.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[Sequence[float]]],
+                 window: float = 0.01, max_batch: int = 100, max_in_flight: int = 4):
+        self._embed_batch = embed_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: List[tuple] = []  # (text, future, enqueued_at)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._dispatch = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embedding-batch")
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batched_texts = 0
+        self.max_batch_seen = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.errors = 0
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> Sequence[float]:
+        """Embed one text, sharing an API call with any concurrent requests."""
+        future: Future = Future()
+        with self._cond:
+            self._queue.append((text, future, time.monotonic()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future.result(timeout)
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = self._queue[0][2] + self.window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            self._dispatch.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[tuple]):
+        started = time.monotonic()
+        unique = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            result = list(self._embed_batch(unique))
+            if len(result) != len(unique):
+                raise RuntimeError(f"Embedding call returned {len(result)} vectors for {len(unique)} texts")
+            vectors = dict(zip(unique, result))
+            for text, future, _ in batch:
+                future.set_result(vectors[text])
+        except Exception as e:
+            with self._metrics_lock:
+                self.errors += 1
+            # Every caller gets an answer; none may be left waiting for its timeout
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        waits = [started - enqueued_at for _, _, enqueued_at in batch]
+        with self._metrics_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batched_texts += len(unique)
+            self.max_batch_seen = max(self.max_batch_seen, len(unique))
+            self.queue_wait_total += sum(waits)
+            self.queue_wait_max = max(self.queue_wait_max, max(waits))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen,
+                "avg_queue_wait_ms": round(self.queue_wait_total / self.requests * 1000, 3) if self.requests else 0.0,
+                "max_queue_wait_ms": round(self.queue_wait_max * 1000, 3),
+                "errors": self.errors,
+            }
@@ -0,0 +1,65 @@
+# embedding_cache.py
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from .cache_store import LruTtlStore, normalize_text
+
+
+def _decode_vector(blob: bytes) -> array:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec
+
+
+class EmbeddingCache:
+    """
+    Normalised-text → embedding cache with LRU eviction and a TTL.
+
+    Entries are namespaced by embedding model and output dimensionality (and by task,
+    since query and document embeddings differ), so switching either never serves a
+    stale vector. Vectors are held as float32 arrays; when `path` is given they are
+    also persisted in SQLite so repeat queries survive process restarts.
+    """
+
+    def __init__(self, model: str, dim: int, max_entries: int = 4096,
+                 ttl: Optional[float] = None, path: Optional[str] = None):
+        self.model = model
+        self.dim = dim
+        self._store: LruTtlStore[array] = LruTtlStore(
+            max_entries=max_entries, ttl=ttl, path=path, table="embedding_entries",
+            encode=lambda vec: vec.tobytes(), decode=_decode_vector,
+        )
+
+    @property
+    def max_entries(self) -> int:
+        return self._store.max_entries
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case-fold, NFKC-normalise and collapse whitespace."""
+        return normalize_text(text)
+
+    def _key(self, text: str, task: str) -> str:
+        return f"{self.model}:{self.dim}:{task}:{self.normalize(text)}"
+
+    # --- Lookup ---
+
+    def get(self, text: str, task: str = "query") -> Optional[array]:
+        """Return the cached float32 vector for `text`, or None on a miss."""
+        return self._store.get(self._key(text, task))
+
+    def get_many(self, texts: Sequence[str], task: str = "query") -> List[Optional[array]]:
+        return [self.get(t, task=task) for t in texts]
+
+    # --- Store ---
+
+    def put(self, text: str, vector: Sequence[float], task: str = "query"):
+        self.put_many([text], [vector], task=task)
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], task: str = "query"):
+        self._store.put_many(
+            (self._key(text, task), array("f", vector)) for text, vector in zip(texts, vectors)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return self._store.stats()
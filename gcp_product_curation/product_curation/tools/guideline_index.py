@@ -0,0 +1,491 @@
+# guideline_index.py
+"""
+ANN index management for product_guidelines.embedding.
+
+Chooses HNSW or IVFFlat (config.GUIDELINE_INDEX_TYPE) over full-precision, halfvec or
+binary-quantized embeddings (config.GUIDELINE_VECTOR_STORAGE), derives build parameters from
+the row count, applies per-query search settings (ivfflat.probes / hnsw.ef_search,
+plus iterative scans for filtered queries on pgvector >= 0.8) on pooled connections,
+rebuilds the index when it no longer matches the data, and reports index size and
+recall against exact search.
+
+Usage:
+    python -m product_curation.tools.guideline_index report [--samples N] [--top-k K]
+    python -m product_curation.tools.guideline_index rebuild
+    python -m product_curation.tools.guideline_index benchmark [--samples N] [--top-k K]
+"""
+import argparse
+import json
+import math
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from product_curation import config
+from .alloydb_pool import AlloyDBPool, get_pool
+
+INDEX_NAME = "product_guidelines_embedding_idx"
+INDEX_TYPES = ("hnsw", "ivfflat")
+VECTOR_STORAGES = ("full", "halfvec", "bit")
+_QUERY_VECTOR = object()  # placeholder for the sample query vector in benchmark params
+
+
+@contextmanager
+def exact_scan(conn):
+    """
+    Run the block in a transaction with plain index scans disabled, so ORDER BY distance
+    is answered exactly. Bitmap scans on the category/tags indexes stay available, which
+    keeps filtered exact searches cheap.
+    """
+    conn.autocommit = False
+    try:
+        cur = conn.cursor()
+        cur.execute("SET LOCAL enable_indexscan = off;")
+        yield cur
+        cur.close()
+        conn.rollback()
+    except BaseException:
+        # Never hand an aborted transaction back to the pool
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = True
+
+
+class GuidelineIndexManager:
+    """Creates, tunes and inspects the vector index on product_guidelines."""
+
+    def __init__(self, pool: Optional[AlloyDBPool] = None, index_type: Optional[str] = None,
+                 storage: Optional[str] = None, embedding_dim: int = 768, index_name: str = INDEX_NAME):
+        self.pool = pool or get_pool()
+        self.index_type = (index_type or config.GUIDELINE_INDEX_TYPE).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type {self.index_type!r}; expected one of {INDEX_TYPES}")
+        self.storage = (storage or config.GUIDELINE_VECTOR_STORAGE).lower()
+        if self.storage not in VECTOR_STORAGES:
+            raise ValueError(f"Unsupported vector storage {self.storage!r}; expected one of {VECTOR_STORAGES}")
+        self.embedding_dim = embedding_dim
+        self.index_name = index_name
+        # Search settings already applied per pooled connection, so unchanged values cost no round trip
+        self._applied: "weakref.WeakKeyDictionary[Any, Dict[str, str]]" = weakref.WeakKeyDictionary()
+        self._applied_lock = threading.Lock()
+        self._lists_hint: Optional[int] = None  # lists of the built IVFFlat index, for probes
+        self.iterative_scan = False  # pgvector >= 0.8 keeps scanning until filters yield top_k rows
+
+    # --- Parameter derivation ---
+
+    @staticmethod
+    def ivfflat_lists(rows: int) -> int:
+        """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+        if rows <= 1_000_000:
+            return max(1, rows // 1000)
+        return int(math.sqrt(rows))
+
+    @staticmethod
+    def ivfflat_probes(lists: int) -> int:
+        return max(1, int(math.sqrt(lists)))
+
+    @staticmethod
+    def hnsw_build_params(rows: int) -> Dict[str, int]:
+        if rows <= 1_000_000:
+            return {"m": 16, "ef_construction": 64}
+        return {"m": 24, "ef_construction": 128}
+
+    @staticmethod
+    def hnsw_ef_search(top_k: int) -> int:
+        # ef_search bounds the number of candidates returned, so it must cover top_k
+        return max(config.HNSW_EF_SEARCH, top_k * 4)
+
+    def build_params(self, rows: int) -> Dict[str, int]:
+        if self.index_type == "hnsw":
+            return self.hnsw_build_params(rows)
+        return {"lists": self.ivfflat_lists(rows)}
+
+    def ann_limit(self, limit: int) -> int:
+        """Rows the ANN index scan must yield for a nearest_sql(limit) query."""
+        return limit if self.storage == "full" else limit * config.RERANK_FACTOR
+
+    def query_settings(self, top_k: int, filtered: bool = False) -> Dict[str, str]:
+        """
+        Search-time settings for an index scan returning `top_k` rows (pass ann_limit(),
+        not the caller's result count: without iterative scans HNSW yields at most
+        ef_search rows). With iterative scans the index keeps producing candidates
+        until the filter is satisfied; without them, filtered queries over-fetch instead.
+        """
+        overfetch = config.FILTER_OVERFETCH if filtered and not self.iterative_scan else 1
+        if self.index_type == "hnsw":
+            settings = {"hnsw.ef_search": str(min(1000, self.hnsw_ef_search(top_k) * overfetch))}
+            if self.iterative_scan:
+                settings["hnsw.iterative_scan"] = "strict_order"
+            return settings
+        if config.IVFFLAT_PROBES:
+            probes = config.IVFFLAT_PROBES
+        else:
+            probes = self.ivfflat_probes(self._lists_hint) if self._lists_hint else 10
+        probes *= overfetch
+        if self._lists_hint:
+            probes = min(probes, self._lists_hint)
+        settings = {"ivfflat.probes": str(probes)}
+        if self.iterative_scan:
+            settings["ivfflat.iterative_scan"] = "relaxed_order"
+        return settings
+
+    # --- Index expressions / search SQL ---
+
+    def _index_expression(self) -> str:
+        """Indexed expression and operator class for the configured storage."""
+        if self.storage == "halfvec":
+            return f"(embedding::halfvec({self.embedding_dim})) halfvec_cosine_ops"
+        if self.storage == "bit":
+            return f"(binary_quantize(embedding)::bit({self.embedding_dim})) bit_hamming_ops"
+        return "embedding vector_cosine_ops"
+
+    def _ann_order_expression(self, vec_sql: str) -> str:
+        """ORDER BY expression that matches the index for a query vector expression."""
+        if self.storage == "halfvec":
+            return f"embedding::halfvec({self.embedding_dim}) <=> ({vec_sql})::halfvec({self.embedding_dim})"
+        if self.storage == "bit":
+            return (f"binary_quantize(embedding)::bit({self.embedding_dim}) "
+                    f"<~> binary_quantize({vec_sql})::bit({self.embedding_dim})")
+        return f"embedding <=> {vec_sql}"
+
+    def nearest_sql(self, vec_sql: str, vec_params: list, filter_sql: str, filter_params: list,
+                    limit: int) -> Tuple[str, list]:
+        """
+        Subquery yielding (id, distance) of the `limit` nearest rows by cosine distance,
+        ordered by distance. `vec_sql` is the query vector expression (e.g. "%s::vector"
+        with `vec_params`, or a LATERAL column with none).
+
+        With quantized storage the ANN stage orders by the halfvec/bit index expression over
+        limit * RERANK_FACTOR candidates, which are re-ranked by full-precision distance;
+        a bound query vector is sent once and shared by both stages.
+        """
+        if self.storage == "full":
+            sql = f"""
+                SELECT id, embedding <=> {vec_sql} AS distance
+                FROM product_guidelines
+                WHERE 1=1 {filter_sql}
+                ORDER BY distance LIMIT %s
+            """
+            return sql, [*vec_params, *filter_params, limit]
+        if not vec_params:
+            # A column of an enclosing query (e.g. LATERAL q.vec): nothing to bind
+            sql = f"""
+                SELECT id, embedding <=> {vec_sql} AS distance
+                FROM (
+                    SELECT id, embedding
+                    FROM product_guidelines
+                    WHERE 1=1 {filter_sql}
+                    ORDER BY {self._ann_order_expression(vec_sql)}
+                    LIMIT %s
+                ) candidates
+                ORDER BY distance LIMIT %s
+            """
+            return sql, [*filter_params, self.ann_limit(limit), limit]
+        # Bind the query vector once and use it for both the ANN stage and the re-rank
+        sql = f"""
+            WITH qv AS (SELECT {vec_sql} AS v)
+            SELECT c.id, c.embedding <=> qv.v AS distance
+            FROM qv, LATERAL (
+                SELECT id, embedding
+                FROM product_guidelines
+                WHERE 1=1 {filter_sql}
+                ORDER BY {self._ann_order_expression("qv.v")}
+                LIMIT %s
+            ) c
+            ORDER BY distance LIMIT %s
+        """
+        return sql, [*vec_params, *filter_params, self.ann_limit(limit), limit]
+
+    # --- Inspection ---
+
+    @staticmethod
+    def _row_count(cur) -> int:
+        cur.execute("SELECT count(*) FROM product_guidelines;")
+        return int(cur.fetchone()[0])
+
+    def _current_index(self, cur) -> Optional[Tuple[str, str, Dict[str, int]]]:
+        """Return (method, storage, params) of the existing index, or None."""
+        cur.execute("SELECT indexdef FROM pg_indexes WHERE tablename = 'product_guidelines' AND indexname = %s;",
+                    (self.index_name,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        indexdef = row[0]
+        method = re.search(r"USING (\w+)", indexdef).group(1).lower()
+        if "binary_quantize" in indexdef:
+            storage = "bit"
+        elif "halfvec" in indexdef:
+            storage = "halfvec"
+        else:
+            storage = "full"
+        params = {k: int(v) for k, v in re.findall(r"(\w+)='?(\d+)'?", indexdef)}
+        return method, storage, params
+
+    def _create_sql(self, name: str, params: Dict[str, int], concurrently: bool = False) -> str:
+        with_clause = ", ".join(f"{k} = {v}" for k, v in params.items())
+        return (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} "
+            f"ON product_guidelines USING {self.index_type} ({self._index_expression()}) "
+            f"WITH ({with_clause});"
+        )
+
+    # --- Lifecycle ---
+
+    def ensure(self, cur):
+        """
+        Create the index during schema bootstrap if it is missing. IVFFlat is not built on an
+        empty table (its centroids would be meaningless); ingestion builds it once data exists.
+        """
+        if self._current_index(cur) is None:
+            rows = self._row_count(cur)
+            if self.index_type == "ivfflat" and rows == 0:
+                return
+            cur.execute(self._create_sql(self.index_name, self.build_params(rows)))
+        self.refresh_hints(cur)
+
+    def needs_rebuild(self, cur) -> bool:
+        current = self._current_index(cur)
+        rows = self._row_count(cur)
+        if current is None:
+            return not (self.index_type == "ivfflat" and rows == 0)
+        method, storage, params = current
+        return method != self.index_type or storage != self.storage or params != self.build_params(rows)
+
+    def rebuild(self, force: bool = False) -> Dict[str, Any]:
+        """
+        (Re)build the index with parameters derived from the current row count.
+        The replacement is built CONCURRENTLY under a temporary name, the old index is
+        renamed aside and the new one renamed into place in one transaction, and only then
+        is the old one dropped, so searches keep an index throughout.
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            if not force and not self.needs_rebuild(cur):
+                cur.close()
+                return {"status": "unchanged", "index_type": self.index_type}
+            rows = self._row_count(cur)
+            params = self.build_params(rows)
+            started = time.perf_counter()
+            tmp_name, old_name = f"{self.index_name}_new", f"{self.index_name}_old"
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name};")
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old_name};")
+            cur.execute(self._create_sql(tmp_name, params, concurrently=True))
+            # Swap both names in one transaction, so the index name always resolves
+            conn.autocommit = False
+            try:
+                cur.execute(f"ALTER INDEX IF EXISTS {self.index_name} RENAME TO {old_name};")
+                cur.execute(f"ALTER INDEX {tmp_name} RENAME TO {self.index_name};")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.autocommit = True
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old_name};")
+            cur.execute("ANALYZE product_guidelines;")
+            cur.close()
+        self._lists_hint = params.get("lists")
+        with self._applied_lock:
+            self._applied.clear()
+        return {
+            "status": "rebuilt",
+            "index_type": self.index_type,
+            "storage": self.storage,
+            "params": params,
+            "rows": rows,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def apply_query_settings(self, conn, top_k: int, filtered: bool = False):
+        """Set search-time parameters on a pooled connection, skipping values already in effect."""
+        settings = self.query_settings(top_k, filtered=filtered)
+        with self._applied_lock:
+            applied = self._applied.setdefault(conn, {})
+            changed = {k: v for k, v in settings.items() if applied.get(k) != v}
+        if not changed:
+            return
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT " + ", ".join("set_config(%s, %s, false)" for _ in changed) + ";",
+            tuple(x for kv in changed.items() for x in kv),
+        )
+        cur.close()
+        with self._applied_lock:
+            self._applied.setdefault(conn, {}).update(changed)
+
+    def refresh_hints(self, cur):
+        """
+        Remember the IVFFlat list count so probes scale with the built index, and whether
+        the installed pgvector supports iterative index scans.
+        """
+        current = self._current_index(cur)
+        if current is not None:
+            self._lists_hint = current[2].get("lists")
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector';")
+        row = cur.fetchone()
+        if row is not None:
+            version = tuple(int(p) for p in re.findall(r"\d+", row[0])[:2])
+            self.iterative_scan = version >= (0, 8)
+
+    # --- Reporting ---
+
+    def report(self, samples: int = 20, top_k: int = 4) -> Dict[str, Any]:
+        """
+        Index/table sizes plus recall@top_k and latency of the ANN search (including the
+        re-rank stage for quantized storage) vs exact search, using stored embeddings as
+        sample queries (no embedding API calls).
+        """
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            self.refresh_hints(cur)
+            current = self._current_index(cur)
+            rows = self._row_count(cur)
+            cur.execute("""
+            SELECT pg_relation_size('product_guidelines'),
+                   pg_total_relation_size('product_guidelines'),
+                   coalesce(pg_relation_size(to_regclass(%s)), 0);
+            """, (self.index_name,))
+            table_bytes, total_bytes, index_bytes = cur.fetchone()
+            queries = self._sample_queries(cur, samples)
+            cur.close()
+
+            self.apply_query_settings(conn, self.ann_limit(top_k))
+            ann, ann_ms = self._run_queries(conn, queries, top_k, exact=False)
+            exact, exact_ms = self._run_queries(conn, queries, top_k, exact=True)
+
+        return {
+            "index_type": current[0] if current else None,
+            "storage": current[1] if current else None,
+            "index_params": current[2] if current else None,
+            "rows": rows,
+            "table_bytes": table_bytes,
+            "total_bytes": total_bytes,
+            "index_bytes": index_bytes,
+            "search_settings": self.query_settings(top_k),
+            "samples": len(queries),
+            "top_k": top_k,
+            "recall": self._recall(ann, exact),
+            "ann_ms_avg": round(ann_ms / max(1, len(queries)), 3),
+            "exact_ms_avg": round(exact_ms / max(1, len(queries)), 3),
+        }
+
+    def benchmark(self, samples: int = 20, top_k: int = 4) -> Dict[str, Any]:
+        """
+        Compare full-precision, halfvec and binary-quantized layouts: each gets a temporary
+        index of the configured type, and the report lists its size, recall@top_k (after
+        re-ranking) and latency. Temporary indexes are dropped afterwards.
+        """
+        results = {}
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            self.refresh_hints(cur)
+            rows = self._row_count(cur)
+            queries = self._sample_queries(cur, samples)
+            cur.close()
+            exact, exact_ms = self._run_queries(conn, queries, top_k, exact=True)
+
+            for storage in VECTOR_STORAGES:
+                bench = GuidelineIndexManager(self.pool, index_type=self.index_type, storage=storage,
+                                              embedding_dim=self.embedding_dim,
+                                              index_name=f"product_guidelines_bench_{storage}_idx")
+                bench.iterative_scan = self.iterative_scan
+                params = bench.build_params(rows)
+                bench._lists_hint = params.get("lists")
+                cur = conn.cursor()
+                cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {bench.index_name};")
+                started = time.perf_counter()
+                cur.execute(bench._create_sql(bench.index_name, params, concurrently=True))
+                build_s = time.perf_counter() - started
+                cur.execute("SELECT pg_relation_size(to_regclass(%s));", (bench.index_name,))
+                index_bytes = cur.fetchone()[0]
+                cur.close()
+                try:
+                    bench.apply_query_settings(conn, bench.ann_limit(top_k))
+                    ann, ann_ms = bench._run_queries(conn, queries, top_k, exact=False)
+                finally:
+                    cur = conn.cursor()
+                    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {bench.index_name};")
+                    cur.close()
+                results[storage] = {
+                    "index_bytes": index_bytes,
+                    "build_seconds": round(build_s, 3),
+                    "recall": self._recall(ann, exact),
+                    "ann_ms_avg": round(ann_ms / max(1, len(queries)), 3),
+                }
+
+        with self._applied_lock:
+            self._applied.clear()
+        return {
+            "index_type": self.index_type,
+            "rows": rows,
+            "samples": len(queries),
+            "top_k": top_k,
+            "rerank_factor": config.RERANK_FACTOR,
+            "exact_ms_avg": round(exact_ms / max(1, len(queries)), 3),
+            "storages": results,
+        }
+
+    @staticmethod
+    def _sample_queries(cur, samples: int) -> List[str]:
+        cur.execute("SELECT embedding::text FROM product_guidelines ORDER BY random() LIMIT %s;", (samples,))
+        return [r[0] for r in cur.fetchall()]
+
+    @staticmethod
+    def _recall(ann: List[List[int]], exact: List[List[int]]) -> Optional[float]:
+        recalls = [len(set(a) & set(e)) / len(e) for a, e in zip(ann, exact) if e]
+        return round(sum(recalls) / len(recalls), 4) if recalls else None
+
+    def _run_queries(self, conn, queries: List[str], top_k: int, exact: bool) -> Tuple[List[List[int]], float]:
+        if exact:
+            sql, params = ("SELECT id, embedding <=> %s::vector AS distance FROM product_guidelines "
+                           "ORDER BY distance LIMIT %s;"), [_QUERY_VECTOR, top_k]
+        else:
+            sql, params = self.nearest_sql("%s::vector", [_QUERY_VECTOR], "", [], top_k)
+        results = []
+
+        def run(cur):
+            started = time.perf_counter()
+            for q in queries:
+                cur.execute(sql, tuple(q if p is _QUERY_VECTOR else p for p in params))
+                results.append([r[0] for r in cur.fetchall()])
+            return (time.perf_counter() - started) * 1000
+
+        if exact:
+            with exact_scan(conn) as cur:
+                elapsed_ms = run(cur)
+        else:
+            cur = conn.cursor()
+            elapsed_ms = run(cur)
+            cur.close()
+        return results, elapsed_ms
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Manage the guideline vector index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="Show index size and recall vs exact search")
+    report.add_argument("--samples", type=int, default=20)
+    report.add_argument("--top-k", type=int, default=4)
+    rebuild = sub.add_parser("rebuild", help="Rebuild the index for the current row count")
+    rebuild.add_argument("--force", action="store_true")
+    benchmark = sub.add_parser("benchmark", help="Compare index size and recall of full / halfvec / bit storage")
+    benchmark.add_argument("--samples", type=int, default=20)
+    benchmark.add_argument("--top-k", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    manager = GuidelineIndexManager()
+    if args.command == "report":
+        result = manager.report(samples=args.samples, top_k=args.top_k)
+    elif args.command == "benchmark":
+        result = manager.benchmark(samples=args.samples, top_k=args.top_k)
+    else:
+        result = manager.rebuild(force=args.force)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# guideline_ingest.py
+"""
+Bulk ingestion of guideline documents into AlloyDB.
+
+Files are read line by line, one at a time, from a directory and chunked by section,
+sentence and token count (see chunker.py); the chunks are reconciled against the
+stored content hashes, and only new or changed chunks are embedded (in parallel
+batches sized to the embedding API limit) and written with binary COPY, all
+inside a single transaction. Documents whose file has been removed are deleted in the
+same transaction. Re-running on an unchanged corpus embeds nothing.
+Afterwards the vector index is rebuilt if its parameters no longer fit the row count.
+
+With --local the same chunks are embedded into a LocalGuidelineIndex on disk
+(config.LOCAL_GUIDELINE_INDEX_PATH) for the database-free backend instead.
+
+Usage:
+    python -m product_curation.tools.guideline_ingest [DIRECTORY] [--category C] [--tags a,b] [--local]
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from product_curation import config
+from .chunker import Chunk, iter_file_chunks, titled_text
+from .guideline_search_tool import GuidelineConsultantTool, get_guideline_tool
+from .local_guideline_index import LocalGuidelineIndex
+
+DEFAULT_EXTENSIONS = (".txt", ".md")
+
+
+def iter_documents(directory: str, extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS) -> Iterator[Tuple[str, str]]:
+    """Yield (document_name, path) for each matching file; contents are streamed by the caller."""
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if not filename.lower().endswith(extensions):
+                continue
+            path = os.path.join(root, filename)
+            yield os.path.relpath(path, directory), path
+
+
+def _iter_file_chunks(tool: GuidelineConsultantTool, path: str) -> Iterator[Chunk]:
+    """Chunks of a file, streamed: lines are read lazily and chunks yielded as they fill."""
+    return iter_file_chunks(path, max_tokens=config.CHUNK_MAX_TOKENS,
+                            overlap_tokens=config.CHUNK_OVERLAP_TOKENS, count_tokens=tool.count_tokens)
+
+
+def _iter_embedded(tool: GuidelineConsultantTool, batches: Iterator[List[tuple]],
+                   workers: int) -> Iterator[Tuple[List[tuple], List[Any]]]:
+    """
+    Embed row batches `workers` at a time, yielding (batch, embeddings) in order.
+    At most workers * 2 batches are in flight, so memory stays flat on large corpora.
+    """
+    def embed(batch):
+        return batch, tool._embed_texts([titled_text(row[4], row[5]) for row in batch])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(embed, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _batched(rows: Iterable[tuple], batch_size: int) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iter_pending_batches(tool: GuidelineConsultantTool, cur, documents: Iterator[Tuple[str, str]],
+                          category: Optional[str], tags: Optional[List[str]],
+                          batch_size: int, stats: Dict[str, Any], seen: List[str]) -> Iterator[List[tuple]]:
+    """
+    Sync each document against stored hashes (appending its name to `seen`) and group
+    the chunk rows that still need embedding into batches of at most batch_size.
+    """
+    def rows():
+        for document_name, path in documents:
+            # Reconciliation needs the document's full chunk list (its hash decides "unchanged"),
+            # so memory here is bounded by the largest single document, not the corpus
+            chunks = list(_iter_file_chunks(tool, path))
+            sync = tool._sync_document(cur, document_name, chunks, category, tags)
+            seen.append(document_name)
+            stats["documents"] += 1
+            stats[sync["status"]] += 1
+            stats["kept"] += sync["kept"]
+            stats["deleted"] += sync["deleted"]
+            yield from sync["to_insert"]
+
+    return _batched(rows(), batch_size)
+
+
+def _prune_removed(cur, seen: List[str]) -> Tuple[int, int]:
+    """Delete chunks of documents not seen in this run; returns (documents, chunks) removed."""
+    cur.execute("""
+    WITH gone AS (
+        DELETE FROM product_guidelines WHERE NOT (document_name = ANY(%s::text[]))
+        RETURNING document_name
+    )
+    SELECT count(DISTINCT document_name), count(*) FROM gone;
+    """, (seen,))
+    documents, chunks = cur.fetchone()
+    return documents, chunks
+
+
+def _write_batch(tool: GuidelineConsultantTool, cur, embedded) -> int:
+    batch, embeddings = embedded
+    tool._insert_chunks(cur, [row + (emb,) for row, emb in zip(batch, embeddings)])
+    return len(batch)
+
+
+def ingest_directory(directory: str = config.GUIDELINE_DOCS_DIR,
+                     category: Optional[str] = None,
+                     tags: Optional[List[str]] = None,
+                     batch_size: int = config.EMBEDDING_BATCH_SIZE,
+                     workers: int = config.INGEST_EMBED_WORKERS,
+                     tool: Optional[GuidelineConsultantTool] = None,
+                     prune: bool = True) -> Dict[str, Any]:
+    """
+    Ingest every guideline file under `directory`.
+    Embedding batches run `workers` at a time while earlier batches are written,
+    and everything commits (or rolls back) together. With `prune`, documents whose
+    file is no longer in the directory are deleted in the same transaction, so the
+    table mirrors the directory (documents added with add_document included).
+    """
+    tool = tool or get_guideline_tool()
+    tool._ensure_schema()
+    started = time.perf_counter()
+    stats = {"documents": 0, "created": 0, "updated": 0, "unchanged": 0, "kept": 0, "deleted": 0, "removed": 0}
+    chunk_count = 0
+    seen: List[str] = []
+
+    with tool.pool.transaction() as conn:
+        cur = conn.cursor()
+        batches = _iter_pending_batches(tool, cur, iter_documents(directory), category, tags, batch_size,
+                                        stats, seen)
+        for embedded in _iter_embedded(tool, batches, workers):
+            chunk_count += _write_batch(tool, cur, embedded)
+        if prune and seen:
+            removed, removed_chunks = _prune_removed(cur, seen)
+            stats["removed"] += removed
+            stats["deleted"] += removed_chunks
+        elif prune:
+            # An empty (or mistyped) directory must not wipe the table
+            print(f"⚠️ No guideline files found under {directory}; skipping removal of stale documents")
+        cur.close()
+
+    elapsed = time.perf_counter() - started
+    index = None
+    if config.REINDEX_AFTER_INGEST and (chunk_count or stats["deleted"]):
+        index = tool.index_manager.rebuild()
+    return {
+        "status": "success",
+        **stats,
+        "index": index,
+        "chunks": chunk_count,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(chunk_count / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def build_local_index(directory: str = config.GUIDELINE_DOCS_DIR,
+                      output: str = config.LOCAL_GUIDELINE_INDEX_PATH,
+                      category: Optional[str] = None,
+                      tags: Optional[List[str]] = None,
+                      batch_size: int = config.EMBEDDING_BATCH_SIZE,
+                      workers: int = config.INGEST_EMBED_WORKERS) -> Dict[str, Any]:
+    """Embed every guideline file under `directory` into a local, memory-mappable index."""
+    tool = GuidelineConsultantTool(backend="local")
+    started = time.perf_counter()
+
+    documents = 0
+
+    def rows():
+        nonlocal documents
+        for document_name, path in iter_documents(directory):
+            documents += 1
+            for idx, chunk in enumerate(_iter_file_chunks(tool, path)):
+                yield document_name, idx, category, tags, chunk.text, chunk.section_title
+
+    # Chunks are embedded batch by batch and streamed into the index files as they come back
+    embedded = _iter_embedded(tool, _batched(rows(), batch_size), workers)
+    chunk_count = LocalGuidelineIndex.build(
+        output,
+        (row + (emb,) for batch, embeddings in embedded for row, emb in zip(batch, embeddings)),
+        model=tool.embedding_model_name,
+        dim=tool.embedding_dim,
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "status": "success",
+        "path": output,
+        "documents": documents,
+        "chunks": chunk_count,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(chunk_count / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest guideline documents into AlloyDB.")
+    parser.add_argument("directory", nargs="?", default=config.GUIDELINE_DOCS_DIR)
+    parser.add_argument("--category", default=None)
+    parser.add_argument("--tags", default=None, help="Comma-separated tags")
+    parser.add_argument("--batch-size", type=int, default=config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=config.INGEST_EMBED_WORKERS)
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep stored documents whose file is no longer in the directory")
+    parser.add_argument("--local", action="store_true",
+                        help="Build the local (database-free) index instead of writing to AlloyDB")
+    parser.add_argument("--output", default=config.LOCAL_GUIDELINE_INDEX_PATH,
+                        help="Output directory for --local")
+    args = parser.parse_args(argv)
+
+    tags = [t.strip() for t in args.tags.split(",") if t.strip()] if args.tags else None
+    if args.local:
+        result = build_local_index(args.directory, output=args.output, category=args.category, tags=tags,
+                                   batch_size=args.batch_size, workers=args.workers)
+        print(f"Built local index at {result['path']}: {result['chunks']} chunks from "
+              f"{result['documents']} documents in {result['seconds']}s ({result['chunks_per_sec']} chunks/s)")
+        return
+
+    result = ingest_directory(args.directory, category=args.category, tags=tags,
+                              batch_size=args.batch_size, workers=args.workers, prune=not args.no_prune)
+    print(f"Ingested {result['chunks']} new chunks from {result['documents']} documents "
+          f"({result['created']} created, {result['updated']} updated, {result['unchanged']} unchanged, "
+          f"{result['removed']} removed; "
+          f"{result['kept']} chunks kept, {result['deleted']} deleted) "
+          f"in {result['seconds']}s ({result['chunks_per_sec']} chunks/s)")
+    if result["index"]:
+        print(f"Vector index: {result['index']}")
+
+
+if __name__ == "__main__":
+    main()
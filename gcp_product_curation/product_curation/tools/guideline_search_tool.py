@@ -1,189 +1,514 @@
 import os
-import pg8000
-from typing import Any, Dict, List, Optional
+import asyncio
+import functools
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from google.adk.tools import LongRunningFunctionTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
 from dotenv import load_dotenv
 
+from product_curation import config
+from .alloydb_pool import AlloyDBPool, get_pool
+from .chunker import Chunk, get_token_counter, iter_chunks, titled_text
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache
+from .guideline_index import GuidelineIndexManager, exact_scan
+from .local_guideline_index import LocalGuidelineIndex
+from .rate_limit import get_limiter
+from .result_postprocess import postprocess_snippets
+from .vector_codec import copy_binary, vector_param
+
 load_dotenv()  # Load environment variables from .env
 
 
 class GuidelineConsultantTool:
     """
     Tool to insert and retrieve guideline snippets from AlloyDB using pg8000 + pgvector.
-    Supports chunking and metadata (category, tags).
+    Supports section-aware chunking and metadata (category, tags, section_title).
+    Connections come from the process-wide AlloyDB pool; the schema is bootstrapped once per pool.
+    With backend="local" searches run against a memory-mapped LocalGuidelineIndex instead (no database).
     """
 
-    def __init__(self):
-        # DB connection params
-        self.db_user = os.getenv("ALLOYDB_USER")
-        self.db_pass = os.getenv("ALLOYDB_PASS")
-        self.db_name = os.getenv("ALLOYDB_NAME")
-        self.db_host = os.getenv("ALLOYDB_HOST")
-        self.db_port = int(os.getenv("ALLOYDB_PORT"))
+    def __init__(self, pool: Optional[AlloyDBPool] = None, backend: Optional[str] = None):
         self.project_id = os.getenv("GCP_PROJECT_ID")
         self.location = os.getenv("GCP_LOCATION")
         self.cluster = os.getenv("ALLOYDB_CLUSTER")
         self.instance = os.getenv("ALLOYDB_INSTANCE")
 
+        self.backend = (backend or config.GUIDELINE_BACKEND).lower()
+        self._local_index: Optional[LocalGuidelineIndex] = None
+        if self.backend not in ("alloydb", "local"):
+            raise ValueError(f"Unsupported guideline backend {self.backend!r}; expected 'alloydb' or 'local'")
+
         # Embedding model — force 768‑dim output
+        self.embedding_model_name = "models/gemini-embedding-001"
         self.embedding_model = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001"
+            model=self.embedding_model_name
         )
         self.embedding_dim = 768  # matches output_dimensionality
-
-        # Ensure schema exists on init
-        self._ensure_schema()
-
-    def _connect(self):
-        """Create a pg8000 connection."""
-        return pg8000.connect(
-            user=self.db_user,
-            password=self.db_pass,
-            database=self.db_name,
-            host=self.db_host,
-            port=self.db_port,
+        # Embedding API calls are paced and retried (429/5xx) under the process-wide limit
+        self.embedding_limiter = get_limiter("embeddings")
+        self._count_tokens = None  # chunk-sizing tokenizer, loaded on first chunking
+
+        # Repeat queries (e.g. "{product} CMEK policy" from sibling agents) skip the API call
+        self.embedding_cache = EmbeddingCache(
+            model=self.embedding_model_name,
+            dim=self.embedding_dim,
+            max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl=config.EMBEDDING_CACHE_TTL,
+            path=config.EMBEDDING_CACHE_PATH,
         )
 
-    def _ensure_schema(self):
-        """Ensure table and vector index exist."""
+        # Concurrent single-query embeddings (parallel discovery agents) share one batched call
+        self.embedding_batcher = EmbeddingBatcher(
+            lambda texts: self.embedding_limiter.call(lambda: self.embedding_model.embed_documents(
+                texts,
+                task_type="RETRIEVAL_QUERY",
+                output_dimensionality=self.embedding_dim
+            )),
+            window=config.EMBEDDING_BATCH_WINDOW_MS / 1000,
+            max_batch=config.EMBEDDING_BATCH_SIZE,
+        ) if config.EMBEDDING_MICROBATCH else None
+
+        # Ensure schema exists (no-op once the pool has been bootstrapped); a failure here is
+        # retried by the next search / write instead of being cached with the tool
+        self._schema_ready = False
+        if self.backend == "alloydb":
+            self.pool = pool or get_pool()
+            self.index_manager = GuidelineIndexManager(self.pool, embedding_dim=self.embedding_dim)
+            self._ensure_schema()
+
+    @property
+    def local_index(self) -> LocalGuidelineIndex:
+        """The on-disk local index, loaded (memory-mapped) on first use."""
+        if self._local_index is None:
+            index = LocalGuidelineIndex(config.LOCAL_GUIDELINE_INDEX_PATH)
+            if index.model != self.embedding_model_name or index.dim != self.embedding_dim:
+                raise RuntimeError(
+                    f"Local guideline index was built with {index.model} ({index.dim} dims); "
+                    f"rebuild it for {self.embedding_model_name} ({self.embedding_dim} dims)."
+                )
+            self._local_index = index
+        return self._local_index
+
+    def _ensure_schema(self) -> bool:
+        """
+        Ensure table and vector index exist (runs once per pool) and load this tool's index
+        hints. Cheap once it has succeeded; called again from every database path until then.
+        """
+        if self._schema_ready:
+            return True
         try:
-            conn = self._connect()
-            cur = conn.cursor()
-
-            # Enable pgvector extension
-            cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
-
-            # Ensure table exists with metadata columns
-            cur.execute(f"""
-            CREATE TABLE IF NOT EXISTS product_guidelines (
-                id BIGSERIAL PRIMARY KEY,
-                document_name TEXT,
-                chunk_index INT NOT NULL,
-                category TEXT,
-                tags TEXT[],
-                text_content TEXT,
-                embedding vector({self.embedding_dim})
-            );
-            """)
-
-            # Ensure vector index exists
-            cur.execute("""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (
-                    SELECT 1
-                    FROM pg_indexes
-                    WHERE tablename = 'product_guidelines'
-                      AND indexname = 'product_guidelines_embedding_idx'
-                ) THEN
-                    CREATE INDEX product_guidelines_embedding_idx
-                    ON product_guidelines
-                    USING ivfflat (embedding vector_cosine_ops)
-                    WITH (lists = 100);
-                END IF;
-            END$$;
-            """)
-
-            conn.commit()
-            cur.close()
-            conn.close()
-
+            self.pool.bootstrap(self._create_schema)
+            # The pool may have been bootstrapped by another tool instance
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                self.index_manager.refresh_hints(cur)
+                cur.close()
+            self._schema_ready = True
         except Exception as e:
             print(f"⚠️ Schema setup failed: {e}")
-
-    def _embed_text(self, text: str) -> List[float]:
-        """Get embedding vector for a single text input."""
-        return self.embedding_model.embed_query(
-            text,
-            output_dimensionality=self.embedding_dim
+        return self._schema_ready
+
+    def _create_schema(self, conn):
+        cur = conn.cursor()
+
+        # Enable pgvector extension
+        cur.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+
+        # Ensure table exists with metadata columns
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS product_guidelines (
+            id BIGSERIAL PRIMARY KEY,
+            document_name TEXT,
+            chunk_index INT NOT NULL,
+            category TEXT,
+            tags TEXT[],
+            text_content TEXT,
+            embedding vector({self.embedding_dim})
+        );
+        """)
+
+        # Content hashes for incremental re-ingestion (added to pre-existing tables too)
+        cur.execute("ALTER TABLE product_guidelines ADD COLUMN IF NOT EXISTS content_hash TEXT;")
+        cur.execute("ALTER TABLE product_guidelines ADD COLUMN IF NOT EXISTS document_hash TEXT;")
+        cur.execute("ALTER TABLE product_guidelines ADD COLUMN IF NOT EXISTS section_title TEXT;")
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS product_guidelines_document_name_idx
+        ON product_guidelines (document_name);
+        """)
+
+        # Metadata filter indexes, so filtered searches can bitmap-scan instead of post-filtering
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS product_guidelines_category_idx
+        ON product_guidelines (category);
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS product_guidelines_tags_idx
+        ON product_guidelines USING GIN (tags);
+        """)
+
+        # Full-text column + GIN index for hybrid keyword retrieval (section title included).
+        # Tables created before the title was indexed get the generated column rebuilt once.
+        cur.execute("""
+        SELECT pg_get_expr(d.adbin, d.adrelid)
+        FROM pg_attrdef d
+        JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+        WHERE d.adrelid = 'product_guidelines'::regclass AND a.attname = 'text_search';
+        """)
+        row = cur.fetchone()
+        if row and "section_title" not in row[0]:
+            cur.execute("ALTER TABLE product_guidelines DROP COLUMN text_search;")
+        cur.execute("""
+        ALTER TABLE product_guidelines ADD COLUMN IF NOT EXISTS text_search tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(section_title, '') || ' ' || coalesce(text_content, ''))
+        ) STORED;
+        """)
+        cur.execute("""
+        CREATE INDEX IF NOT EXISTS product_guidelines_text_search_idx
+        ON product_guidelines USING GIN (text_search);
+        """)
+
+        # Ensure vector index exists (type and parameters come from the index manager)
+        self.index_manager.ensure(cur)
+
+        cur.close()
+
+    def _embed_text(self, text: str) -> Sequence[float]:
+        """Get embedding vector for a single text input (cached, micro-batched with concurrent callers)."""
+        cached = self.embedding_cache.get(text, task="query")
+        if cached is not None:
+            return cached
+        if self.embedding_batcher is not None:
+            embedding = self.embedding_batcher.embed(text, timeout=config.GUIDELINE_SEARCH_TIMEOUT)
+        else:
+            embedding = self.embedding_limiter.call(lambda: self.embedding_model.embed_query(
+                text,
+                output_dimensionality=self.embedding_dim
+            ))
+        self.embedding_cache.put(text, embedding, task="query")
+        return embedding
+
+    def _embed_texts(self, texts: List[str], task: str = "document") -> List[Sequence[float]]:
+        """
+        Embed multiple texts in a single API call (faster); only cache misses are sent.
+        task="query" embeds search queries (RETRIEVAL_QUERY) rather than documents.
+        """
+        embeddings = self.embedding_cache.get_many(texts, task=task)
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            fresh = self.embedding_limiter.call(lambda: self.embedding_model.embed_documents(
+                [texts[i] for i in missing],
+                task_type="RETRIEVAL_QUERY" if task == "query" else "RETRIEVAL_DOCUMENT",
+                output_dimensionality=self.embedding_dim
+            ))
+            self.embedding_cache.put_many([texts[i] for i in missing], fresh, task=task)
+            for i, emb in zip(missing, fresh):
+                embeddings[i] = emb
+        return embeddings
+
+    @property
+    def count_tokens(self):
+        """Token counter used to size chunks (see config.CHUNK_TOKENIZER)."""
+        if self._count_tokens is None:
+            self._count_tokens = get_token_counter(config.CHUNK_TOKENIZER)
+        return self._count_tokens
+
+    def _chunk_lines(self, lines) -> List[Chunk]:
+        """Chunk an iterable of lines (e.g. an open file, read lazily) by section, sentence and token count."""
+        return list(iter_chunks(lines, max_tokens=config.CHUNK_MAX_TOKENS,
+                                overlap_tokens=config.CHUNK_OVERLAP_TOKENS, count_tokens=self.count_tokens))
+
+    def _chunk_text(self, text: str) -> List[Chunk]:
+        """Split text into overlapping, section-aware chunks."""
+        return self._chunk_lines(text.splitlines())
+
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _hash_chunk(self, chunk: Chunk) -> str:
+        # The section title is embedded with the chunk, so a renamed section counts as changed
+        # content. The "t1" prefix re-embeds chunks stored before titles were part of the embedding.
+        return self._hash_text(f"t1\x1f{chunk.section_title or ''}\x1f{chunk.text}")
+
+    def _document_hash(self, chunks: List[Chunk], category: Optional[str], tags: Optional[List[str]]) -> str:
+        """Hash of a document version: its chunk hashes plus metadata."""
+        h = hashlib.sha256()
+        h.update(f"{category}\x1f{sorted(tags or [])}".encode("utf-8"))
+        for chunk in chunks:
+            h.update(self._hash_chunk(chunk).encode("ascii"))
+        return h.hexdigest()
+
+    def _sync_document(self, cur, document_name: str, chunks: List[Chunk],
+                       category: Optional[str], tags: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Reconcile stored chunks of `document_name` with `chunks`, inside the caller's transaction.
+
+        Chunks whose content hash is already stored are kept (re-indexed and re-tagged if
+        needed), stale chunks are deleted, and only new/changed chunks are returned in
+        "to_insert" as (document_name, chunk_index, category, tags, text_content,
+        section_title, content_hash, document_hash) rows that still need embedding.
+        """
+        document_hash = self._document_hash(chunks, category, tags)
+
+        # Serialise concurrent ingestion of the same document
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (document_name,))
+        cur.execute(
+            "SELECT id, content_hash, document_hash FROM product_guidelines WHERE document_name = %s;",
+            (document_name,),
         )
-
-    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts in a single API call (faster)."""
-        return self.embedding_model.embed_documents(
-            texts,
-            output_dimensionality=self.embedding_dim
+        existing = cur.fetchall()
+
+        if existing and len(existing) == len(chunks) and all(row[2] == document_hash for row in existing):
+            return {"status": "unchanged", "document_hash": document_hash,
+                    "kept": len(existing), "deleted": 0, "to_insert": []}
+
+        available: Dict[str, List[int]] = {}
+        for row_id, content_hash, _ in existing:
+            if content_hash:
+                available.setdefault(content_hash, []).append(row_id)
+
+        kept_ids, kept_indexes, to_insert = [], [], []
+        for idx, chunk in enumerate(chunks):
+            content_hash = self._hash_chunk(chunk)
+            ids = available.get(content_hash)
+            if ids:
+                kept_ids.append(ids.pop())
+                kept_indexes.append(idx)
+            else:
+                to_insert.append((document_name, idx, category, tags, chunk.text, chunk.section_title,
+                                  content_hash, document_hash))
+
+        kept = set(kept_ids)
+        stale_ids = [row[0] for row in existing if row[0] not in kept]
+        if stale_ids:
+            cur.execute("DELETE FROM product_guidelines WHERE id = ANY(%s);", (stale_ids,))
+        if kept_ids:
+            cur.execute(
+                """
+                UPDATE product_guidelines AS p
+                SET chunk_index = u.chunk_index, category = %s, tags = %s, document_hash = %s
+                FROM unnest(%s::bigint[], %s::int[]) AS u(id, chunk_index)
+                WHERE p.id = u.id;
+                """,
+                (category, tags, document_hash, kept_ids, kept_indexes),
+            )
+
+        return {"status": "updated" if existing else "created", "document_hash": document_hash,
+                "kept": len(kept_ids), "deleted": len(stale_ids), "to_insert": to_insert}
+
+    # Column layout of rows passed to _insert_chunks, with their binary COPY types
+    _INSERT_COLUMNS = (
+        ("document_name", "text"), ("chunk_index", "int4"), ("category", "text"), ("tags", "text[]"),
+        ("text_content", "text"), ("section_title", "text"), ("content_hash", "text"), ("document_hash", "text"),
+        ("embedding", "vector"),
+    )
+
+    def _insert_chunks(self, cur, rows: List[tuple]) -> List[int]:
+        """
+        Insert (document_name, chunk_index, category, tags, text_content, section_title,
+        content_hash, document_hash, embedding) rows. Rows are streamed with binary COPY into a temp
+        staging table (float32 vectors, no text formatting) and moved into
+        product_guidelines in one statement. Returns the new ids in row order.
+        """
+        if not rows:
+            return []
+        columns = ", ".join(name for name, _ in self._INSERT_COLUMNS)
+        cur.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS product_guidelines_staging (
+            seq INT,
+            document_name TEXT,
+            chunk_index INT,
+            category TEXT,
+            tags TEXT[],
+            text_content TEXT,
+            section_title TEXT,
+            content_hash TEXT,
+            document_hash TEXT,
+            embedding vector({self.embedding_dim})
+        ) ON COMMIT DELETE ROWS;
+        """)
+        payload = copy_binary(
+            ((seq,) + tuple(row) for seq, row in enumerate(rows)),
+            ["int4"] + [t for _, t in self._INSERT_COLUMNS],
         )
-
-    def _chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
-        """Split text into overlapping chunks."""
-        words = text.split()
-        chunks = []
-        start = 0
-        while start < len(words):
-            end = start + chunk_size
-            chunk = " ".join(words[start:end])
-            chunks.append(chunk)
-            start += chunk_size - overlap
-        return chunks
+        cur.execute(
+            f"COPY product_guidelines_staging (seq, {columns}) FROM STDIN WITH (FORMAT binary);",
+            stream=io.BytesIO(payload),
+        )
+        cur.execute(f"""
+        WITH moved AS (
+            DELETE FROM product_guidelines_staging RETURNING *
+        )
+        INSERT INTO product_guidelines ({columns})
+        SELECT {columns} FROM moved ORDER BY seq
+        RETURNING id;
+        """)
+        return [row[0] for row in cur.fetchall()]
 
     def add_document(self, document_name: str, text_content: str,
                      category: Optional[str] = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Embed and insert a document in chunks with metadata."""
+        """
+        Embed and upsert a document in chunks with metadata.
+        Idempotent: only new or changed chunks are embedded, stale chunks are removed.
+        """
+        if self.backend == "local":
+            return {"error": "add_document needs the alloydb backend; rebuild the local index with guideline_ingest --local"}
         try:
             chunks = self._chunk_text(text_content)
-            embeddings = self._embed_texts(chunks)
-
-            conn = self._connect()
-            cur = conn.cursor()
-
-            inserted_ids = []
-            for idx, (chunk, emb) in enumerate(zip(chunks, embeddings)):
-                vector_str = "[" + ",".join(str(x) for x in emb) + "]"
-                cur.execute(
-                    """
-                    INSERT INTO product_guidelines
-                    (document_name, chunk_index, category, tags, text_content, embedding)
-                    VALUES (%s, %s, %s, %s, %s, %s::vector)
-                    RETURNING id;
-                    """,
-                    (document_name, idx, category, tags, chunk, vector_str),
+            self._ensure_schema()
+
+            with self.pool.transaction() as conn:
+                cur = conn.cursor()
+                sync = self._sync_document(cur, document_name, chunks, category, tags)
+                to_insert = sync["to_insert"]
+                embeddings = self._embed_texts([titled_text(row[4], row[5]) for row in to_insert]) if to_insert else []
+                inserted_ids = self._insert_chunks(
+                    cur, [row + (emb,) for row, emb in zip(to_insert, embeddings)]
                 )
-                inserted_ids.append(cur.fetchone()[0])
+                cur.close()
 
-            conn.commit()
-            cur.close()
-            conn.close()
-
-            return {"status": "success", "inserted_ids": inserted_ids}
+            return {
+                "status": "success",
+                "document_status": sync["status"],
+                "inserted_ids": inserted_ids,
+                "kept": sync["kept"],
+                "deleted": sync["deleted"],
+            }
 
         except Exception as e:
             return {"error": str(e)}
 
+    @staticmethod
+    def _filter_sql(category: Optional[str], tags: Optional[List[str]], alias: str = "") -> tuple:
+        """WHERE-clause fragment and params for the optional metadata filters."""
+        sql, params = "", []
+        if category:
+            sql += f" AND {alias}category = %s"
+            params.append(category)
+        if tags:
+            sql += f" AND {alias}tags && %s"  # overlap operator for arrays
+            params.append(tags)
+        return sql, params
+
+    @staticmethod
+    def _hybrid_candidates(top_k: int) -> int:
+        """Candidates each hybrid retriever (keyword, vector) contributes to the fusion."""
+        return max(top_k * config.HYBRID_CANDIDATE_MULTIPLIER, top_k)
+
+    def _ann_limit(self, top_k: int, mode: str) -> int:
+        """Rows the vector index scan must yield for a search returning top_k results."""
+        limit = self._hybrid_candidates(top_k) if mode == "hybrid" else top_k
+        return self.index_manager.ann_limit(limit)
+
+    def _vector_search_sql(self, vector: str, top_k: int,
+                           category: Optional[str], tags: Optional[List[str]]) -> tuple:
+        # Nearest rows come from the index manager (ANN stage + re-rank for quantized storage)
+        filter_sql, filter_params = self._filter_sql(category, tags)
+        nearest_sql, nearest_params = self.index_manager.nearest_sql(
+            "%s::vector", [vector], filter_sql, filter_params, top_k
+        )
+        sql = f"""
+        SELECT p.id, p.document_name, p.chunk_index, p.category, p.tags, p.text_content,
+               n.distance, NULL AS score, p.section_title
+        FROM ({nearest_sql}) n
+        JOIN product_guidelines p ON p.id = n.id
+        ORDER BY n.distance
+        """
+        return sql, nearest_params
+
+    def _hybrid_search_sql(self, vector: str, query_text: str, top_k: int,
+                           category: Optional[str], tags: Optional[List[str]]) -> tuple:
+        """
+        Keyword (tsvector/GIN) and vector candidates fused with reciprocal rank fusion,
+        in a single statement. Keyword terms are OR-ed so long questions still match
+        exact identifiers such as policy constraint names.
+        """
+        candidates = self._hybrid_candidates(top_k)
+        filter_sql, filter_params = self._filter_sql(category, tags)
+        p_filter_sql, _ = self._filter_sql(category, tags, alias="p.")
+        nearest_sql, nearest_params = self.index_manager.nearest_sql(
+            "%s::vector", [vector], filter_sql, filter_params, candidates
+        )
+        sql = f"""
+        WITH kwq AS (
+            SELECT replace(plainto_tsquery('english', %s)::text, '&', '|')::tsquery AS q
+        ),
+        vector_hits AS (
+            SELECT id, distance, row_number() OVER (ORDER BY distance) AS rank
+            FROM ({nearest_sql}) v
+        ),
+        keyword_hits AS (
+            SELECT p.id, row_number() OVER (ORDER BY ts_rank_cd(p.text_search, kwq.q) DESC) AS rank
+            FROM product_guidelines p, kwq
+            WHERE p.text_search @@ kwq.q {p_filter_sql}
+            ORDER BY ts_rank_cd(p.text_search, kwq.q) DESC
+            LIMIT %s
+        ),
+        fused AS (
+            SELECT id, sum(1.0 / (%s + rank)) AS score
+            FROM (
+                SELECT id, rank FROM vector_hits
+                UNION ALL
+                SELECT id, rank FROM keyword_hits
+            ) ranked
+            GROUP BY id
+        )
+        SELECT p.id, p.document_name, p.chunk_index, p.category, p.tags, p.text_content,
+               vh.distance, f.score, p.section_title
+        FROM fused f
+        JOIN product_guidelines p ON p.id = f.id
+        LEFT JOIN vector_hits vh ON vh.id = f.id
+        ORDER BY f.score DESC
+        LIMIT %s
+        """
+        params = [query_text, *nearest_params,
+                  *filter_params, candidates, config.RRF_K, top_k]
+        return sql, params
+
     def execute(self, query_text: str, top_k: int = 4,
-                category: Optional[str] = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Execute similarity search with optional metadata filters."""
+                category: Optional[str] = None, tags: Optional[List[str]] = None,
+                mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Execute a guideline search with optional metadata filters.
+        mode: "vector" (cosine only) or "hybrid" (keyword + vector with rank fusion);
+        defaults to config.GUIDELINE_SEARCH_MODE.
+        """
         try:
-            query_embedding = self._embed_text(query_text)
-            vector_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
-
-            conn = self._connect()
-            cur = conn.cursor()
-
-            sql = """
-            SELECT id, document_name, chunk_index, category, tags, text_content,
-                   1 - (embedding <=> %s::vector) AS similarity
-            FROM product_guidelines
-            WHERE 1=1
-            """
-            params = [vector_str]
-
-            if category:
-                sql += " AND category = %s"
-                params.append(category)
-            if tags:
-                sql += " AND tags && %s"  # overlap operator for arrays
-                params.append(tags)
-
-            sql += " ORDER BY embedding <=> %s::vector LIMIT %s"
-            params.extend([vector_str, top_k])
-
-            cur.execute(sql, tuple(params))
-            rows = cur.fetchall()
-
-            cur.close()
-            conn.close()
+            if self.backend == "local":
+                # The local index is vector-only; mode is ignored
+                snippets = self.local_index.search(self._embed_text(query_text), top_k, category, tags)
+                return {"guideline_snippets": snippets}
+
+            mode = mode or config.GUIDELINE_SEARCH_MODE
+            vector = vector_param(self._embed_text(query_text))
+            if mode == "hybrid":
+                sql, params = self._hybrid_search_sql(vector, query_text, top_k, category, tags)
+            else:
+                sql, params = self._vector_search_sql(vector, top_k, category, tags)
+
+            filtered = bool(category or tags)
+            self._ensure_schema()
+            with self.pool.connection() as conn:
+                self.index_manager.apply_query_settings(conn, self._ann_limit(top_k, mode), filtered=filtered)
+                cur = conn.cursor()
+                cur.execute(sql, tuple(params))
+                rows = cur.fetchall()
+                cur.close()
+
+                if filtered and len(rows) < top_k:
+                    # The ANN scan ran out of candidates before the filter yielded top_k rows:
+                    # refine with an exact scan over the filtered rows.
+                    with exact_scan(conn) as cur:
+                        cur.execute(sql, tuple(params))
+                        rows = cur.fetchall()
 
             snippets = [
                 {
@@ -193,7 +518,10 @@ class GuidelineConsultantTool:
                     "category": row[3],
                     "tags": row[4],
                     "text_content": row[5],
-                    "similarity": float(row[6]),
+                    # Keyword-only hybrid hits have no vector distance
+                    "similarity": 1.0 - float(row[6]) if row[6] is not None else None,
+                    "score": float(row[7]) if row[7] is not None else None,
+                    "section_title": row[8],
                 }
                 for row in rows
             ]
@@ -203,20 +531,310 @@ class GuidelineConsultantTool:
         except Exception as e:
             return {"error": str(e)}
 
+    def _batch_search_sql(self, mode: str, queries: List[str], vectors: List[str], top_k: int,
+                          category: Optional[str], tags: Optional[List[str]]) -> tuple:
+        """
+        One statement answering every query: the queries are UNNESTed WITH ORDINALITY
+        and each runs its own top_k search in a LATERAL subquery.
+        """
+        filter_sql, filter_params = self._filter_sql(category, tags)
+        if mode == "hybrid":
+            candidates = self._hybrid_candidates(top_k)
+            nearest_sql, nearest_params = self.index_manager.nearest_sql(
+                "q.vec", [], filter_sql, filter_params, candidates
+            )
+            per_query = f"""
+                SELECT p.id, p.document_name, p.chunk_index, p.category, p.tags, p.text_content,
+                       f.distance, f.score, p.section_title
+                FROM (
+                    SELECT id, min(distance) AS distance, sum(1.0 / (%s + rank)) AS score
+                    FROM (
+                        SELECT id, distance, row_number() OVER (ORDER BY distance) AS rank
+                        FROM ({nearest_sql}) v
+                        UNION ALL
+                        SELECT id, NULL::float8 AS distance,
+                               row_number() OVER (ORDER BY ts_rank_cd(text_search, q.tsq) DESC) AS rank
+                        FROM (
+                            SELECT id, text_search
+                            FROM product_guidelines
+                            WHERE text_search @@ q.tsq {filter_sql}
+                            ORDER BY ts_rank_cd(text_search, q.tsq) DESC LIMIT %s
+                        ) k
+                    ) ranked
+                    GROUP BY id
+                ) f
+                JOIN product_guidelines p ON p.id = f.id
+                ORDER BY f.score DESC
+                LIMIT %s
+            """
+            per_query_params = [config.RRF_K, *nearest_params, *filter_params, candidates, top_k]
+        else:
+            nearest_sql, nearest_params = self.index_manager.nearest_sql(
+                "q.vec", [], filter_sql, filter_params, top_k
+            )
+            per_query = f"""
+                SELECT p.id, p.document_name, p.chunk_index, p.category, p.tags, p.text_content,
+                       n.distance, NULL::float8 AS score, p.section_title
+                FROM ({nearest_sql}) n
+                JOIN product_guidelines p ON p.id = n.id
+            """
+            per_query_params = nearest_params
+
+        sql = f"""
+        WITH q AS (
+            SELECT ord, qvec::vector AS vec,
+                   replace(plainto_tsquery('english', qtext)::text, '&', '|')::tsquery AS tsq
+            FROM unnest(%s::text[], %s::text[]) WITH ORDINALITY AS u(qtext, qvec, ord)
+        )
+        SELECT q.ord, r.*
+        FROM q CROSS JOIN LATERAL ({per_query}) r
+        ORDER BY q.ord, r.score DESC NULLS LAST, r.distance
+        """
+        return sql, [list(queries), list(vectors), *per_query_params]
+
+    def execute_many(self, queries: List[str], top_k: int = 4,
+                     category: Optional[str] = None, tags: Optional[List[str]] = None,
+                     mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search several queries at once: one embedding call for all of them and one SQL
+        round trip. Returns {"results": [{"query": ..., "guideline_snippets": [...]}, ...]}
+        in input order.
+        """
+        try:
+            if not queries:
+                return {"results": []}
+            embeddings = self._embed_texts(list(queries), task="query")
+            if self.backend == "local":
+                per_query = self.local_index.search_many(embeddings, top_k, category, tags)
+                return {"results": [
+                    {"query": q, "guideline_snippets": snippets} for q, snippets in zip(queries, per_query)
+                ]}
+
+            mode = mode or config.GUIDELINE_SEARCH_MODE
+            vectors = [vector_param(v) for v in embeddings]
+            sql, params = self._batch_search_sql(mode, queries, vectors, top_k, category, tags)
+
+            filtered = bool(category or tags)
+            self._ensure_schema()
+            with self.pool.connection() as conn:
+                self.index_manager.apply_query_settings(conn, self._ann_limit(top_k, mode), filtered=filtered)
+                cur = conn.cursor()
+                cur.execute(sql, tuple(params))
+                rows = cur.fetchall()
+                cur.close()
+
+                if filtered and len(rows) < top_k * len(queries):
+                    # Same refinement as execute(): exact scan when the filter starved the ANN scan
+                    with exact_scan(conn) as cur:
+                        cur.execute(sql, tuple(params))
+                        rows = cur.fetchall()
+
+            results = [{"query": q, "guideline_snippets": []} for q in queries]
+            for row in rows:
+                results[row[0] - 1]["guideline_snippets"].append({
+                    "id": row[1],
+                    "document_name": row[2],
+                    "chunk_index": row[3],
+                    "category": row[4],
+                    "tags": row[5],
+                    "text_content": row[6],
+                    "similarity": 1.0 - float(row[7]) if row[7] is not None else None,
+                    "score": float(row[8]) if row[8] is not None else None,
+                    "section_title": row[9],
+                })
+            return {"results": results}
+
+        except Exception as e:
+            return {"error": str(e)}
+
+
+# Shared instance: one embeddings client and one pool for the whole process
+_shared_tool: Optional[GuidelineConsultantTool] = None
+_shared_tool_lock = threading.Lock()
+
+
+def get_guideline_tool() -> GuidelineConsultantTool:
+    """Return the process-wide GuidelineConsultantTool, creating it on first use."""
+    global _shared_tool
+    if _shared_tool is None:
+        with _shared_tool_lock:
+            if _shared_tool is None:
+                _shared_tool = GuidelineConsultantTool()
+    return _shared_tool
+
+
+def _format_snippets(snippets: List[Dict[str, Any]]) -> str:
+    """Snippet texts for the model, each prefixed with its section title when known."""
+    return "\n\n".join(
+        f"[{s['section_title']}] {s['text_content']}" if s.get("section_title") else s["text_content"]
+        for s in snippets
+    )
+
 
 # Helper for direct calls
 def search_documents_in_alloydb(query: str, k: int = 4,
                                 category: Optional[str] = None, tags: Optional[List[str]] = None) -> str:
-    tool = GuidelineConsultantTool()
+    tool = get_guideline_tool()
     results = tool.execute(query_text=query, top_k=k, category=category, tags=tags)
-    snippets = results.get("guideline_snippets", [])
+    snippets = postprocess_snippets(results.get("guideline_snippets", []),
+                                    max_tokens=config.GUIDELINE_RESPONSE_MAX_TOKENS)
     if not snippets:
         return "No relevant guidelines found."
-    return "\n\n".join(s["text_content"] for s in snippets)
+    return _format_snippets(snippets)
+
+
+def search_many_documents_in_alloydb(queries: List[str], k: int = 4,
+                                     category: Optional[str] = None, tags: Optional[List[str]] = None) -> str:
+    tool = get_guideline_tool()
+    results = tool.execute_many(queries=queries, top_k=k, category=category, tags=tags)
+    sections = []
+    for result in results.get("results", []):
+        snippets = postprocess_snippets(result["guideline_snippets"],
+                                        max_tokens=config.GUIDELINE_RESPONSE_MAX_TOKENS)
+        body = _format_snippets(snippets) if snippets else "No relevant guidelines found."
+        sections.append(f"### {result['query']}\n{body}")
+    return "\n\n".join(sections) if sections else "No relevant guidelines found."
+
+
+# Bounded worker pool for the blocking retrieval path (embedding HTTP call + pg8000 I/O).
+# Sized to the connection pool so queued searches wait here rather than on a connection.
+_search_executor = ThreadPoolExecutor(
+    max_workers=config.GUIDELINE_SEARCH_WORKERS,
+    thread_name_prefix="guideline-search",
+)
+
+
+async def search_documents_in_alloydb_async(query: str, k: int = 4,
+                                            category: Optional[str] = None,
+                                            tags: Optional[List[str]] = None) -> str:
+    """
+    Async wrapper around `search_documents_in_alloydb` that runs on the bounded executor.
+    Cancelling the awaiting task drops a search that has not started yet; one already
+    running finishes in its worker and returns its connection to the pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _search_executor,
+        functools.partial(search_documents_in_alloydb, query, k, category, tags),
+    )
+
+
+async def search_many_documents_in_alloydb_async(queries: List[str], k: int = 4,
+                                                 category: Optional[str] = None,
+                                                 tags: Optional[List[str]] = None) -> str:
+    """Async wrapper around `search_many_documents_in_alloydb` (same executor and cancellation)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _search_executor,
+        functools.partial(search_many_documents_in_alloydb, queries, k, category, tags),
+    )
+
+
+class GuidelineSearchTool(BaseTool):
+    """Async tool to search organisational guidelines stored in AlloyDB."""
+    name = "guideline_consultant"
+    description = "Search internal organisational guidelines and standards relevant to a query."
+
+    def __init__(self):
+        super().__init__(name=self.name, description=self.description)
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "query": types.Schema(type=types.Type.STRING, description="What to look up in the guidelines"),
+                    "k": types.Schema(type=types.Type.INTEGER, description="Number of guideline snippets to return"),
+                    "category": types.Schema(type=types.Type.STRING, description="Optional guideline category filter"),
+                    "tags": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(type=types.Type.STRING),
+                        description="Optional tags; matches guidelines sharing any tag",
+                    ),
+                },
+                required=["query"]
+            )
+        )
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        return await self.execute(**args)
+
+    async def execute(self, query: str, k: int = 4,
+                      category: Optional[str] = None, tags: Optional[List[str]] = None) -> dict:
+        if not query:
+            return {"content": [{"type": "text", "text": "Invalid query"}], "isError": True}
+        try:
+            text = await asyncio.wait_for(
+                search_documents_in_alloydb_async(query, k, category, tags),
+                timeout=config.GUIDELINE_SEARCH_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            return {"content": [{"type": "text", "text": "Guideline search timed out"}], "isError": True}
+        except Exception as e:
+            return {"content": [{"type": "text", "text": f"Guideline search error: {e}"}], "isError": True}
+        return {"content": [{"type": "text", "text": text}]}
+
+
+class GuidelineBatchSearchTool(BaseTool):
+    """Async tool to answer several guideline questions in one embedding call and one query."""
+    name = "guideline_consultant_batch"
+    description = (
+        "Search internal organisational guidelines for several questions at once. "
+        "Prefer this over repeated guideline_consultant calls when you have more than one question."
+    )
+
+    def __init__(self):
+        super().__init__(name=self.name, description=self.description)
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        return types.FunctionDeclaration(
+            name=self.name,
+            description=self.description,
+            parameters=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "queries": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(type=types.Type.STRING),
+                        description="Questions to look up in the guidelines",
+                    ),
+                    "k": types.Schema(type=types.Type.INTEGER, description="Number of snippets per question"),
+                    "category": types.Schema(type=types.Type.STRING, description="Optional guideline category filter"),
+                    "tags": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(type=types.Type.STRING),
+                        description="Optional tags; matches guidelines sharing any tag",
+                    ),
+                },
+                required=["queries"]
+            )
+        )
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        return await self.execute(**args)
+
+    async def execute(self, queries: List[str], k: int = 4,
+                      category: Optional[str] = None, tags: Optional[List[str]] = None) -> dict:
+        queries = [q for q in (queries or []) if q]
+        if not queries:
+            return {"content": [{"type": "text", "text": "Invalid queries"}], "isError": True}
+        try:
+            text = await asyncio.wait_for(
+                search_many_documents_in_alloydb_async(queries, k, category, tags),
+                timeout=config.GUIDELINE_SEARCH_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            return {"content": [{"type": "text", "text": "Guideline search timed out"}], "isError": True}
+        except Exception as e:
+            return {"content": [{"type": "text", "text": f"Guideline search error: {e}"}], "isError": True}
+        return {"content": [{"type": "text", "text": text}]}
 
 
 # Register with ADK
-guideline_search_tool = LongRunningFunctionTool(func=search_documents_in_alloydb)
+guideline_search_tool = GuidelineSearchTool()
+guideline_batch_search_tool = GuidelineBatchSearchTool()
 
 # if __name__ == "__main__":
 #     tool = GuidelineConsultantTool()
@@ -0,0 +1,257 @@
+# html_extract.py
+"""
+Pluggable HTML → text extraction for read_webpage.
+
+Backends: "selectolax" (fastest, optional dependency), "lxml" and "bs4" (BeautifulSoup
+with html.parser, the original extractor). "auto" picks the fastest one installed. Every
+backend drops boilerplate (scripts, navigation, headers/footers, forms...), keeps the
+main content (<article>, <main> or role="main", falling back to <body>) and reports the
+page's sections by heading, with each heading's id as its anchor.
+
+Extraction is CPU-bound, so `extract_async` runs it on a worker pool instead of the event loop.
+
+Benchmark against saved pages (legacy = the original whole-body BeautifulSoup extraction):
+    python -m product_curation.tools.html_extract DIRECTORY [--extractors lxml,bs4] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from product_curation import config
+
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe", "form", "button",
+    "nav", "header", "footer", "aside",
+    # Google Cloud docs chrome
+    "devsite-header", "devsite-book-nav", "devsite-toc", "devsite-footer-linkboxes",
+    "devsite-footer-utility", "devsite-feedback", "devsite-thumb-rating",
+)
+HEADING_TAGS = ("h1", "h2", "h3", "h4")
+MIN_MAIN_CONTENT_CHARS = 200  # shorter "main" elements are probably not the article
+
+# Headings are swapped for inline markers before the text is flattened, then split back out.
+# The delimiters are private-use code points: lxml rejects control characters in text.
+_OPEN, _SEP, _CLOSE = "\ue000", "\ue001", "\ue002"
+_MARKER = _OPEN + "{level}" + _SEP + "{anchor}" + _SEP + "{heading}" + _CLOSE
+_MARKER_RE = re.compile(f"{_OPEN}(\\d){_SEP}([^{_SEP}]*){_SEP}([^{_CLOSE}]*){_CLOSE}")
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _marker(tag: str, anchor: Optional[str], heading: str) -> str:
+    heading = _collapse(heading)
+    anchor = anchor or ""
+    for delimiter in (_OPEN, _SEP, _CLOSE):
+        heading, anchor = heading.replace(delimiter, ""), anchor.replace(delimiter, "")
+    return f" {_MARKER.format(level=tag[1], anchor=anchor, heading=heading)} "
+
+
+def _assemble(title: str, flat: str, url: str) -> Dict[str, Any]:
+    """Split marker-annotated text into sections and build the read_webpage content."""
+    parts = _MARKER_RE.split(flat)
+    sections = []
+    lead = _collapse(parts[0])
+    if lead:
+        sections.append({"heading": None, "level": None, "anchor": None, "text": lead})
+    for i in range(1, len(parts), 4):
+        level, anchor, heading, body = parts[i:i + 4]
+        sections.append({"heading": heading, "level": int(level), "anchor": anchor or None,
+                         "text": _collapse(body)})
+    text = " ".join(
+        " ".join(p for p in (s["heading"], s["text"]) if p) for s in sections
+    )
+    return {"title": _collapse(title or ""), "text": text, "url": url, "sections": sections}
+
+
+# --- Backends ---
+
+def _extract_bs4(html: str, url: str) -> Dict[str, Any]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text() if soup.title else ""
+    for tag in soup(list(BOILERPLATE_TAGS)):
+        tag.decompose()
+    root = None
+    for candidate in (soup.find("article"), soup.find("main"), soup.find(attrs={"role": "main"})):
+        if candidate is not None and len(candidate.get_text(strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            root = candidate
+            break
+    root = root or soup.body or soup
+    for h in root.find_all(list(HEADING_TAGS)):
+        h.replace_with(_marker(h.name, h.get("id"), h.get_text(" ")))
+    return _assemble(title, root.get_text(separator=" "), url)
+
+
+def _extract_lxml(html: str, url: str) -> Dict[str, Any]:
+    import lxml.html
+
+    # Bytes input so pages with an XML/encoding declaration parse too
+    doc = lxml.html.document_fromstring(
+        html.encode("utf-8"), parser=lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+    )
+    title = doc.findtext(".//title") or ""
+    for el in list(doc.iter(*BOILERPLATE_TAGS)):  # list(): drop_tree() would upset the iterator
+        el.drop_tree()
+    root = None
+    for path in ("//article", "//main", "//*[@role='main']"):
+        found = doc.xpath(path)
+        if found and len(found[0].text_content().strip()) >= MIN_MAIN_CONTENT_CHARS:
+            root = found[0]
+            break
+    if root is None:
+        body = doc.find("body")
+        root = body if body is not None else doc
+    for h in list(root.iter(*HEADING_TAGS)):
+        h.tail = _marker(h.tag, h.get("id"), h.text_content()) + (h.tail or "")
+        h.drop_tree()
+    return _assemble(title, " ".join(root.itertext()), url)
+
+
+def _extract_selectolax(html: str, url: str) -> Dict[str, Any]:
+    from selectolax.parser import HTMLParser
+
+    tree = HTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text() if title_node else ""
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+    root = None
+    for selector in ("article", "main", "[role=main]"):
+        node = tree.css_first(selector)
+        if node is not None and len(node.text(strip=True)) >= MIN_MAIN_CONTENT_CHARS:
+            root = node
+            break
+    root = root or tree.body or tree.root
+    for h in root.css(",".join(HEADING_TAGS)):
+        h.replace_with(_marker(h.tag, h.attributes.get("id"), h.text(separator=" ")))
+    return _assemble(title, root.text(separator=" "), url)
+
+
+def _extract_legacy(html: str, url: str) -> Dict[str, Any]:
+    """The original read_webpage extraction (whole body, no sections); benchmark baseline only."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    body_text = " ".join(soup.get_text(separator=" ", strip=True).split())
+    return {"title": title, "text": body_text, "url": url}
+
+
+EXTRACTORS: Dict[str, Callable[[str, str], Dict[str, Any]]] = {
+    "selectolax": _extract_selectolax,
+    "lxml": _extract_lxml,
+    "bs4": _extract_bs4,
+}
+_MODULES = {"selectolax": "selectolax.parser", "lxml": "lxml.html", "bs4": "bs4", "legacy": "bs4"}
+
+
+def available_extractors() -> List[str]:
+    """Installed backends, fastest first."""
+    names = []
+    for name in EXTRACTORS:
+        try:
+            __import__(_MODULES[name])
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+def get_extractor(name: Optional[str] = None) -> Callable[[str, str], Dict[str, Any]]:
+    """Extractor by name; "auto" (default: config.HTML_EXTRACTOR) picks the fastest installed one."""
+    name = (name or config.HTML_EXTRACTOR).lower()
+    if name == "auto":
+        available = available_extractors()
+        if not available:
+            raise RuntimeError("No HTML parser installed (need selectolax, lxml or beautifulsoup4)")
+        name = available[0]
+    if name == "legacy":
+        return _extract_legacy
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor {name!r}; expected one of {sorted(EXTRACTORS)} or 'auto'")
+    return EXTRACTORS[name]
+
+
+_extract_executor = ThreadPoolExecutor(
+    max_workers=config.HTML_EXTRACT_WORKERS,
+    thread_name_prefix="html-extract",
+)
+
+
+def extract(html: str, url: str, extractor: Optional[str] = None) -> Dict[str, Any]:
+    return get_extractor(extractor)(html, url)
+
+
+async def extract_async(html: str, url: str, extractor: Optional[str] = None) -> Dict[str, Any]:
+    """Extract on the worker pool so large pages don't block other agents on the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_extract_executor, extract, html, url, extractor)
+
+
+# --- Benchmark ---
+
+def _load_pages(directory: str) -> List[tuple]:
+    pages = []
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.lower().endswith((".html", ".htm")):
+                path = os.path.join(root, filename)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    pages.append((path, f.read()))
+    return pages
+
+
+def benchmark(directory: str, extractors: Optional[List[str]] = None, repeat: int = 3) -> List[Dict[str, Any]]:
+    """Throughput and output size of each extractor over the saved pages in `directory`."""
+    pages = _load_pages(directory)
+    if not pages:
+        raise ValueError(f"No .html files found under {directory}")
+    input_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    names = extractors or ["legacy"] + available_extractors()
+
+    results = []
+    for name in names:
+        fn = get_extractor(name)
+        output_chars = sum(len(fn(html, path)["text"]) for path, html in pages)  # also warms up imports
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for path, html in pages:
+                fn(html, path)
+        elapsed = (time.perf_counter() - started) / repeat
+        results.append({
+            "extractor": name,
+            "pages": len(pages),
+            "ms_per_page": round(elapsed / len(pages) * 1000, 3),
+            "pages_per_sec": round(len(pages) / elapsed, 1) if elapsed > 0 else 0.0,
+            "mb_per_sec": round(input_bytes / elapsed / 1e6, 2) if elapsed > 0 else 0.0,
+            "avg_output_chars": round(output_chars / len(pages)),
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark HTML extractors over saved pages.")
+    parser.add_argument("directory")
+    parser.add_argument("--extractors", default=None,
+                        help="Comma-separated (legacy, selectolax, lxml, bs4); default: legacy + all installed")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.extractors.split(",") if n.strip()] if args.extractors else None
+    results = benchmark(args.directory, names, repeat=args.repeat)
+    print(f"{'extractor':<12} {'ms/page':>10} {'pages/s':>10} {'MB/s':>8} {'avg chars':>10}")
+    for r in results:
+        print(f"{r['extractor']:<12} {r['ms_per_page']:>10} {r['pages_per_sec']:>10} "
+              f"{r['mb_per_sec']:>8} {r['avg_output_chars']:>10}")
+
+
+if __name__ == "__main__":
+    main()
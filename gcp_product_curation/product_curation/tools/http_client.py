@@ -0,0 +1,132 @@
+# http_client.py
+import asyncio
+import codecs
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import httpx
+
+from product_curation import config
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (installed by httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+class FetchedText(NamedTuple):
+    status_code: int
+    headers: httpx.Headers
+    text: str  # empty for 304 Not Modified
+    content_type: str
+    truncated: bool  # body was longer than max_bytes and was cut
+
+
+class UnsupportedContentType(ValueError):
+    pass
+
+
+class SharedHttpClient:
+    """
+    One lazily-created httpx.AsyncClient shared by the web tools.
+
+    Keeps TLS sessions and keep-alive connections (HTTP/2 when h2 is installed) across
+    calls; httpx pools connections per origin, bounded by the limits below. The client is
+    bound to the event loop it was created on and is recreated (the old one closed) if used
+    from another loop.
+    Call `aclose()` on shutdown (MyAgentTools.close does this).
+    """
+
+    def __init__(self, timeout: Optional[httpx.Timeout] = None, limits: Optional[httpx.Limits] = None,
+                 http2: Optional[bool] = None, headers: Optional[Dict[str, str]] = None):
+        self.timeout = timeout or httpx.Timeout(
+            config.HTTP_TIMEOUT,
+            connect=config.HTTP_CONNECT_TIMEOUT,
+            pool=config.HTTP_POOL_TIMEOUT,
+        )
+        self.limits = limits or httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = (config.HTTP2 if http2 is None else http2) and _http2_available()
+        self.headers = headers
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closing: set = set()  # aclose() tasks of replaced clients
+        self.requests = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # A client from another loop can't be reused (its connections belong to that loop)
+            if self._client is not None and not self._client.is_closed:
+                self._retire(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers=self.headers,
+            )
+            self._loop = loop
+        return self._client
+
+    def _retire(self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a replaced client so its pooled connections and sockets don't leak."""
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            # Still serving another thread: close it there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        # Its loop is gone: release the pool from here, best effort
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())  # errors are expected
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        self.requests += 1
+        return await self.client.get(url, **kwargs)
+
+    async def fetch_text(self, url: str, max_bytes: int, content_types: Sequence[str],
+                         headers: Optional[Dict[str, str]] = None) -> FetchedText:
+        """
+        Stream a textual response, decoding incrementally and stopping after `max_bytes`.
+        Responses whose Content-Type doesn't start with one of `content_types` (PDFs,
+        archives, images...) are rejected before the body is read. Raises for 4xx/5xx.
+        """
+        self.requests += 1
+        async with self.client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 304:
+                return FetchedText(304, resp.headers, "", "", False)
+            resp.raise_for_status()
+
+            content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and not content_type.startswith(tuple(content_types)):
+                raise UnsupportedContentType(f"Unsupported content type {content_type!r} for {url}")
+
+            try:
+                decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+            except LookupError:  # bogus charset in the Content-Type header
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            parts, received, truncated = [], 0, False
+            async for chunk in resp.aiter_bytes():
+                if received + len(chunk) > max_bytes:
+                    chunk = chunk[:max_bytes - received]
+                    truncated = True
+                received += len(chunk)
+                parts.append(decoder.decode(chunk))
+                if truncated:
+                    break  # leaving the context closes the connection without reading the rest
+            parts.append(decoder.decode(b"", final=True))
+            return FetchedText(resp.status_code, resp.headers, "".join(parts), content_type, truncated)
+
+    async def aclose(self):
+        client, self._client, self._loop = self._client, None, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "http2": self.http2, "open": self._client is not None}
@@ -0,0 +1,123 @@
+# local_guideline_index.py
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDINGS_FILE = "embeddings.f32"
+METADATA_FILE = "metadata.json"
+
+
+class LocalGuidelineIndex:
+    """
+    Database-free guideline index: a memory-mapped float32 matrix of L2-normalised chunk
+    embeddings plus JSON metadata, searched with vectorised NumPy top-k.
+
+    Built at ingest time (see guideline_ingest --local) and selected with
+    GUIDELINE_BACKEND=local, so dev, test and small deployments need no AlloyDB.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.model = meta["model"]
+        self.dim = meta["dim"]
+        self.chunks: List[Dict[str, Any]] = meta["chunks"]
+
+        rows = len(self.chunks)
+        if rows:
+            self.matrix = np.memmap(os.path.join(path, EMBEDDINGS_FILE), dtype=np.float32,
+                                    mode="r", shape=(rows, self.dim))
+        else:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+        # Metadata columns for filter masks
+        self._categories = np.array([c.get("category") or "" for c in self.chunks], dtype=object)
+        self._tag_rows: Dict[str, np.ndarray] = {}
+        tag_lists: Dict[str, List[int]] = {}
+        for i, c in enumerate(self.chunks):
+            for tag in c.get("tags") or []:
+                tag_lists.setdefault(tag, []).append(i)
+        for tag, ids in tag_lists.items():
+            self._tag_rows[tag] = np.array(ids, dtype=np.int64)
+
+    @staticmethod
+    def build(path: str, rows: Iterable[tuple], model: str, dim: int) -> int:
+        """
+        Write an index from (document_name, chunk_index, category, tags, text_content,
+        section_title, embedding) rows. Returns the number of chunks written.
+        """
+        os.makedirs(path, exist_ok=True)
+        count = 0
+        # Rows are streamed to disk one at a time: vectors appended to the matrix file,
+        # metadata written as one JSON array element per chunk
+        with open(os.path.join(path, EMBEDDINGS_FILE), "wb") as vf, \
+                open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as mf:
+            mf.write(json.dumps({"model": model, "dim": dim})[:-1] + ', "chunks": [')
+            for document_name, chunk_index, category, tags, text_content, section_title, embedding in rows:
+                vector = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                vf.write((vector / norm if norm else vector).astype(np.float32).tobytes())
+                mf.write(("," if count else "") + json.dumps({
+                    "document_name": document_name,
+                    "chunk_index": chunk_index,
+                    "category": category,
+                    "tags": tags,
+                    "text_content": text_content,
+                    "section_title": section_title,
+                }, ensure_ascii=False))
+                count += 1
+            mf.write("]}")
+        return count
+
+    def _mask(self, category: Optional[str], tags: Optional[List[str]]) -> Optional[np.ndarray]:
+        if not category and not tags:
+            return None
+        mask = np.ones(len(self.chunks), dtype=bool)
+        if category:
+            mask &= self._categories == category
+        if tags:
+            tag_mask = np.zeros(len(self.chunks), dtype=bool)
+            for tag in tags:
+                rows = self._tag_rows.get(tag)
+                if rows is not None:
+                    tag_mask[rows] = True
+            mask &= tag_mask
+        return mask
+
+    def _top_k(self, scores: np.ndarray, top_k: int, mask: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            available = int(mask.sum())
+        else:
+            available = scores.shape[0]
+        k = min(top_k, available)
+        if k <= 0:
+            return []
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return [
+            {"id": int(i), **self.chunks[i], "similarity": float(scores[i]), "score": None}
+            for i in idx
+        ]
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def search(self, query_vector: Sequence[float], top_k: int = 4,
+               category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Cosine top-k for one query vector, with optional category/tag masks."""
+        q = self._normalise(np.asarray(query_vector, dtype=np.float32))
+        return self._top_k(self.matrix @ q, top_k, self._mask(category, tags))
+
+    def search_many(self, query_vectors: Sequence[Sequence[float]], top_k: int = 4,
+                    category: Optional[str] = None, tags: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        """Cosine top-k for several query vectors with a single matrix product."""
+        q = self._normalise(np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim))
+        scores = self.matrix @ q.T  # (rows, queries)
+        mask = self._mask(category, tags)
+        return [self._top_k(scores[:, j], top_k, mask) for j in range(q.shape[0])]
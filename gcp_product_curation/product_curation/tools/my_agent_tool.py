@@ -1,24 +1,41 @@
-from typing import Optional, Dict
+import json
+from typing import Any, Dict, List, Optional
 from google.adk.tools.base_toolset import BaseToolset
 from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from .http_client import SharedHttpClient
 from .search_tools import SearchTool, ReadWebpageTool
+from .tool_memo import SessionToolMemo
 # from .guideline_tool import GuidelineConsultantTool
 # from .guideline_search_tool import guideline_search_tool
 
+def _tool_payload(result: Dict[str, Any]) -> Any:
+    """The JSON payload of a search / read_webpage tool result."""
+    text = result["content"][0]["text"]
+    if result.get("isError"):
+        raise RuntimeError(text)
+    return json.loads(text)
+
+
 # --- Toolset Definition ---
 class MyAgentTools(BaseToolset):
     """
     A Toolset that provides instances of SearchTool,
     and ReadWebpageTool to an ADK agent.
+    Both tools share one pooled HTTP client, owned (and closed) by the toolset, and a
+    session-scoped memo, so a search or page read repeated by another sub-agent in the
+    same session is answered from session state.
     """
     tool_name_prefix = ""
 
     def __init__(self):
         # Instantiate your tools
         # self.guideline_tool = GuidelineConsultantTool()
-        self.search_tool = SearchTool()
-        self.read_webpage_tool = ReadWebpageTool()
+        self.http = SharedHttpClient()
+        self.memo = SessionToolMemo()
+        self.search_tool = SearchTool(http=self.http, memo=self.memo)
+        self.read_webpage_tool = ReadWebpageTool(http=self.http, memo=self.memo)
 
     async def get_tools(
         self, readonly_context: Optional[ReadonlyContext] = None
@@ -38,4 +55,45 @@ class MyAgentTools(BaseToolset):
         assert len(names) == len(set(names)), f"Duplicate tool names detected: {names}"
 
         print("Tools returned:", names)
-        return tools
\ No newline at end of file
+        return tools
+
+    # --- Direct (non-LLM) calls, e.g. from the research prefetch ---
+
+    async def search(self, query: str, tool_context: ToolContext) -> List[Dict[str, Any]]:
+        """
+        Search results for `query`, through the same session memo, cache and limiter as
+        the agents' `search` calls (same arguments, so their later calls are memo hits).
+        Raises RuntimeError if the search failed.
+        """
+        result = await self.memo.run(self.search_tool.name, {"query": query}, tool_context,
+                                     lambda: self.search_tool.execute(query))
+        return _tool_payload(result)
+
+    async def read(self, url: str, tool_context: ToolContext) -> Dict[str, Any]:
+        """
+        Extracted content of `url` (title, text, sections...), through the same session memo,
+        page cache and limiter as the agents' `read_webpage(url)` calls. When the memo already
+        holds the page, its stored result (title, text, url) is returned instead.
+        Raises RuntimeError if the fetch failed.
+        """
+        tool = self.read_webpage_tool
+        fetched: Dict[str, Any] = {}
+
+        async def call():
+            try:
+                fetched["content"] = await tool._fetch_content(url)
+            except Exception as e:
+                return {"content": [{"type": "text", "text": f"Webpage fetch error: {e}"}], "isError": True}
+            return await tool._render(fetched["content"], url)
+
+        result = await self.memo.run(tool.name, {"url": url}, tool_context, call)
+        payload = _tool_payload(result)
+        return fetched.get("content") or payload
+
+    async def close(self) -> None:
+        """Release pooled HTTP connections (called by the runner on shutdown)."""
+        await self.http.aclose()
+
+    def memo_stats(self, session_id: Optional[str] = None) -> Dict:
+        """Calls saved by the session memo (hits from state, coalesced concurrent calls, seconds saved)."""
+        return self.memo.stats(session_id)
@@ -0,0 +1,135 @@
+# page_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class CachedPage(NamedTuple):
+    url: str
+    html: str
+    content: Dict[str, Any]  # extracted title/text as returned by read_webpage
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float  # last time the origin confirmed this copy (200 or 304)
+
+
+class PageCache:
+    """
+    Disk-backed (SQLite) cache of fetched web pages: raw HTML (zlib-compressed) plus the
+    extracted content, keyed by URL.
+
+    Entries younger than `fresh_ttl` are served without contacting the origin; older ones
+    are revalidated with a conditional GET built from `validators()` (If-None-Match /
+    If-Modified-Since), so an unchanged page costs a 304 and no re-parse. The stored bytes
+    are capped at `max_bytes`, evicting least recently used pages first.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, fresh_ttl: float = 3600):
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                html BLOB NOT NULL,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at_idx ON pages (accessed_at)")
+        self._db.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT html, content, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        return CachedPage(url, zlib.decompress(row[0]).decode("utf-8"), json.loads(row[1]), row[2], row[3], row[4])
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return time.time() - page.fetched_at <= self.fresh_ttl
+
+    @staticmethod
+    def validators(page: Optional[CachedPage]) -> Dict[str, str]:
+        """Conditional request headers for revalidating `page`."""
+        headers = {}
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def mark_revalidated(self, url: str):
+        """The origin answered 304: the stored copy is fresh again."""
+        with self._lock:
+            self.revalidated += 1
+            self._db.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def put(self, url: str, html: str, content: Dict[str, Any],
+            etag: Optional[str] = None, last_modified: Optional[str] = None):
+        blob = zlib.compress(html.encode("utf-8"))
+        content_json = json.dumps(content, ensure_ascii=False)
+        size = len(blob) + len(content_json)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO pages (url, html, content, etag, last_modified, fetched_at, accessed_at, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (url, blob, content_json, etag, last_modified, now, now, size),
+            )
+            self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall():
+            self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pages, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "pages": pages,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,98 @@
+# passage_select.py
+"""
+Query-aware passage selection for read_webpage.
+
+An extracted page is split into passages along its sections (and sentence boundaries
+within long sections), the passages are ranked against the caller's question with
+BM25, and the best ones are returned in page order within a token budget, each with
+the heading it sits under and a deep link to that heading.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .chunker import split_sentences
+from .result_postprocess import CHARS_PER_TOKEN, estimate_tokens
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how if in is it its of on or "
+    "that the this to was what when where which who why will with".split()
+)
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def split_passages(content: Dict[str, Any], max_passage_tokens: int = 200) -> List[Dict[str, Any]]:
+    """Passages of at most ~max_passage_tokens, never crossing a section boundary."""
+    url = content.get("url") or ""
+    sections = content.get("sections") or [{"heading": None, "anchor": None, "text": content.get("text", "")}]
+    passages = []
+    for section in sections:
+        anchor = f"{url.split('#')[0]}#{section['anchor']}" if section.get("anchor") else url
+        current, tokens = [], 0
+        for sentence in split_sentences(section.get("text") or ""):
+            t = estimate_tokens(sentence)
+            if current and tokens + t > max_passage_tokens:
+                passages.append({"heading": section.get("heading"), "anchor": anchor, "text": " ".join(current)})
+                current, tokens = [], 0
+            current.append(sentence)
+            tokens += t
+        if current:
+            passages.append({"heading": section.get("heading"), "anchor": anchor, "text": " ".join(current)})
+    return passages
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    query_terms = set(_terms(query))
+    if not query_terms or not documents:
+        return [0.0] * len(documents)
+    doc_terms = [Counter(_terms(d)) for d in documents]
+    lengths = [sum(c.values()) for c in doc_terms]
+    avg_len = sum(lengths) / len(lengths) or 1.0
+    n = len(documents)
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for c in doc_terms if term in c)
+        idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for counts, length in zip(doc_terms, lengths):
+        score = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if tf:
+                score += idf[term] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return scores
+
+
+def select_passages(content: Dict[str, Any], query: str, max_tokens: int,
+                    max_passage_tokens: int = 200) -> List[Dict[str, Any]]:
+    """Top BM25 passages for `query` within max_tokens, returned in page order."""
+    passages = split_passages(content, max_passage_tokens)
+    scores = bm25_scores(query, [f"{p['heading'] or ''} {p['text']}" for p in passages])
+    matched = any(score > 0 for score in scores)
+    # Nothing matched the query: fall back to the start of the page
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True) if matched else range(len(passages))
+
+    chosen, used = [], 0
+    for i in ranked:
+        if matched and scores[i] <= 0:
+            break
+        tokens = estimate_tokens(passages[i]["text"])
+        if used + tokens > max_tokens:
+            continue
+        chosen.append(i)
+        used += tokens
+    return [passages[i] for i in sorted(chosen)]
+
+
+def truncate_text(text: str, max_tokens: int) -> Optional[str]:
+    """`text` cut to roughly max_tokens at a word boundary, or None if it already fits."""
+    if estimate_tokens(text) <= max_tokens:
+        return None
+    return text[:max_tokens * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + " …"
@@ -0,0 +1,244 @@
+# rate_limit.py
+"""
+Process-wide rate limiting and retry governor for upstream APIs.
+
+Each upstream ("search", "web", "embeddings", "llm") gets one UpstreamLimiter shared by
+every agent in the process: a token bucket (QPS with a one-second burst), a cap on
+concurrent calls, and retries of throttled / transient failures with exponential
+backoff and full jitter, honouring Retry-After when the upstream sends one.
+Limits come from config; `all_stats()` reports throttles, retries and failures.
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from product_curation import config
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+_RETRYABLE_MARKERS = ("429", "RESOURCE_EXHAUSTED", "UNAVAILABLE", "503", "Too Many Requests")
+
+
+class TokenBucket:
+    """Reservation-style token bucket usable from threads and coroutines alike."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        if self.rate <= 0:
+            return 0.0  # unlimited
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    for value in (getattr(response, "status_code", None), getattr(exc, "status_code", None),
+                  getattr(exc, "code", None)):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Throttling (429), transient server errors and network timeouts are worth retrying."""
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError,
+                        asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, ValueError):
+        # Our own validation errors (e.g. UnsupportedContentType) may quote a URL or body
+        # that happens to contain a marker; they never succeed on retry
+        return False
+    # SDKs that wrap the HTTP error in a plain exception (e.g. langchain embeddings)
+    message = str(exc)
+    return any(marker in message for marker in _RETRYABLE_MARKERS)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header (delta or HTTP date), if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamLimiter:
+    def __init__(self, name: str, qps: float, max_concurrency: int = 0,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.name = name
+        self.bucket = TokenBucket(qps)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        # asyncio semaphores are bound to a loop, so keep one per loop
+        self._async_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._metrics_lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+        self.throttle_wait = 0.0
+        self.retries = 0
+        self.failures = 0
+
+    def _count(self, **deltas: float):
+        with self._metrics_lock:
+            for key, delta in deltas.items():
+                setattr(self, key, getattr(self, key) + delta)
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        requested = retry_after(exc)
+        if requested is not None:
+            return min(requested, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _should_retry(self, attempt: int, exc: BaseException) -> bool:
+        if attempt < self.max_retries and is_retryable(exc):
+            self._count(retries=1)
+            return True
+        self._count(failures=1)
+        return False
+
+    # --- async ---
+
+    async def wait_turn_async(self):
+        """Wait for a token only (no concurrency slot, no retries)."""
+        wait = self.bucket.reserve()
+        self._count(calls=1)
+        if wait > 0:
+            self._count(throttled=1, throttle_wait=wait)
+            await asyncio.sleep(wait)
+
+    def _async_slot(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        slot = self._async_slots.get(loop)
+        if slot is None:
+            slot = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slot
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` under the limits, retrying retryable failures."""
+        attempt = 0
+        while True:
+            slot = self._async_slot()
+            if slot is not None:
+                await slot.acquire()
+            try:
+                await self.wait_turn_async()
+                return await fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                if slot is not None:
+                    slot.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    # --- sync (worker threads) ---
+
+    def call(self, fn: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            if self._sync_slots is not None:
+                self._sync_slots.acquire()
+            try:
+                wait = self.bucket.reserve()
+                self._count(calls=1)
+                if wait > 0:
+                    self._count(throttled=1, throttle_wait=wait)
+                    time.sleep(wait)
+                return fn()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                if self._sync_slots is not None:
+                    self._sync_slots.release()
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            return {
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "throttle_wait_s": round(self.throttle_wait, 3),
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+def _limits() -> Dict[str, tuple]:
+    return {
+        "search": (config.SEARCH_API_QPS, config.SEARCH_API_CONCURRENCY),
+        "web": (config.WEB_FETCH_QPS, config.WEB_FETCH_CONCURRENCY),
+        "embeddings": (config.EMBEDDING_API_QPS, config.EMBEDDING_API_CONCURRENCY),
+        "llm": (config.LLM_QPS, 0),
+    }
+
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> UpstreamLimiter:
+    """The process-wide limiter for upstream `name`."""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                qps, concurrency = _limits()[name]
+                limiter = _limiters[name] = UpstreamLimiter(
+                    name, qps, concurrency,
+                    max_retries=config.UPSTREAM_MAX_RETRIES,
+                    backoff_base=config.UPSTREAM_BACKOFF_BASE,
+                    backoff_max=config.UPSTREAM_BACKOFF_MAX,
+                )
+    return limiter
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in list(_limiters.items())}
+
+
+async def throttle_llm(callback_context, llm_request):
+    """before_model_callback: pace model calls across all agents; never short-circuits the call."""
+    await get_limiter("llm").wait_turn_async()
+    return None
@@ -0,0 +1,134 @@
+# result_postprocess.py
+"""
+Post-processing of guideline search results before they reach the model.
+
+Consecutive chunks of the same document section are merged with their shared overlap removed,
+near-duplicates are suppressed, the remainder is ordered with MMR-style diversity, and
+the response is cut to a token budget.
+"""
+from typing import Any, Dict, List, Optional, Set
+
+CHARS_PER_TOKEN = 4  # rough average for English prose
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _relevance(snippet: Dict[str, Any]) -> float:
+    """Fused hybrid score when present, otherwise cosine similarity."""
+    if snippet.get("score") is not None:
+        return float(snippet["score"])
+    return float(snippet.get("similarity") or 0.0)
+
+
+def _overlap_words(head: List[str], tail: List[str], max_overlap: int) -> int:
+    """Length of the longest suffix of `head` that is also a prefix of `tail`."""
+    for n in range(min(max_overlap, len(head), len(tail)), 0, -1):
+        if head[-n:] == tail[:n]:
+            return n
+    return 0
+
+
+def merge_adjacent(snippets: List[Dict[str, Any]], max_overlap: int = 100) -> List[Dict[str, Any]]:
+    """
+    Merge hits with consecutive chunk_index from the same document and section into one
+    snippet, dropping the words the chunker repeated between them. The merged snippet keeps the
+    best relevance of its parts and records chunk_start / chunk_end.
+    """
+    by_document: Dict[Any, List[Dict[str, Any]]] = {}
+    for s in snippets:
+        by_document.setdefault(s.get("document_name"), []).append(s)
+
+    merged = []
+    for parts in by_document.values():
+        parts.sort(key=lambda s: s.get("chunk_index", 0))
+        current = None
+        for s in parts:
+            idx = s.get("chunk_index", 0)
+            same_section = current is not None and s.get("section_title") == current.get("section_title")
+            if same_section and idx in (current["chunk_end"], current["chunk_end"] + 1):
+                if idx == current["chunk_end"] + 1:
+                    words = current["text_content"].split()
+                    nxt = s["text_content"].split()
+                    n = _overlap_words(words, nxt, max_overlap)
+                    current["text_content"] = " ".join(words + nxt[n:])
+                    current["chunk_end"] = idx
+                if _relevance(s) > _relevance(current):
+                    current["score"], current["similarity"] = s.get("score"), s.get("similarity")
+                continue
+            current = {**s, "chunk_start": idx, "chunk_end": idx}
+            merged.append(current)
+    return merged
+
+
+def _shingles(text: str, size: int = 3) -> Set[tuple]:
+    words = text.lower().split()
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _containment(a: Set[tuple], b: Set[tuple]) -> float:
+    """Overlap coefficient, so a snippet contained in a longer merged one counts as a duplicate."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def diversify(snippets: List[Dict[str, Any]], lambda_: float = 0.7,
+              duplicate_threshold: float = 0.8) -> List[Dict[str, Any]]:
+    """
+    Order snippets by maximal marginal relevance (relevance vs. word-shingle overlap with
+    what is already selected), dropping near-duplicates above duplicate_threshold.
+    """
+    if not snippets:
+        return []
+    relevances = [_relevance(s) for s in snippets]
+    lo, hi = min(relevances), max(relevances)
+    norm = [(r - lo) / (hi - lo) if hi > lo else 1.0 for r in relevances]
+    shingles = [_shingles(s["text_content"]) for s in snippets]
+
+    remaining = list(range(len(snippets)))
+    selected: List[int] = []
+    while remaining:
+        best, best_score = None, None
+        for i in list(remaining):
+            redundancy = max((_containment(shingles[i], shingles[j]) for j in selected), default=0.0)
+            if redundancy >= duplicate_threshold:
+                remaining.remove(i)
+                continue
+            score = lambda_ * norm[i] - (1 - lambda_) * redundancy
+            if best_score is None or score > best_score:
+                best, best_score = i, score
+        if best is None:
+            break
+        selected.append(best)
+        remaining.remove(best)
+    return [snippets[i] for i in selected]
+
+
+def apply_token_budget(snippets: List[Dict[str, Any]], max_tokens: int) -> List[Dict[str, Any]]:
+    """Keep snippets in order until the budget is spent; the last one is cut at a word boundary."""
+    kept, used = [], 0
+    for s in snippets:
+        tokens = estimate_tokens(s["text_content"])
+        if used + tokens <= max_tokens:
+            kept.append(s)
+            used += tokens
+            continue
+        remaining_chars = (max_tokens - used) * CHARS_PER_TOKEN
+        if remaining_chars > 200:  # not worth sending a fragment shorter than this
+            text = s["text_content"][:remaining_chars].rsplit(" ", 1)[0]
+            kept.append({**s, "text_content": text + " …", "truncated": True})
+        break
+    return kept
+
+
+def postprocess_snippets(snippets: List[Dict[str, Any]], max_tokens: Optional[int] = None,
+                         lambda_: float = 0.7, duplicate_threshold: float = 0.8) -> List[Dict[str, Any]]:
+    """Merge adjacent chunks, diversify, and (optionally) enforce a token budget."""
+    result = diversify(merge_adjacent(snippets), lambda_=lambda_, duplicate_threshold=duplicate_threshold)
+    if max_tokens:
+        result = apply_token_budget(result, max_tokens)
+    return result
@@ -0,0 +1,65 @@
+# search_cache.py
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .cache_store import LruTtlStore, normalize_text
+from .single_flight import SingleFlight
+
+
+class SearchCache:
+    """
+    TTL + LRU cache of web search results keyed by normalised query and result count,
+    with single-flight de-duplication: concurrent identical searches (parallel agents
+    asking about the same product) share one upstream call.
+
+    When `path` is given, results are also persisted in SQLite so repeat curations of the
+    same product are served without calling the search API at all (until the TTL expires).
+    SQLite reads and writes run in a worker thread, off the event loop.
+    Only successful results are cached.
+    """
+
+    def __init__(self, ttl: Optional[float] = 3600, max_entries: int = 1024, path: Optional[str] = None):
+        self._store: LruTtlStore[List[Dict[str, Any]]] = LruTtlStore(
+            max_entries=max_entries, ttl=ttl, path=path, table="search_entries",
+            encode=lambda results: json.dumps(results, ensure_ascii=False), decode=json.loads,
+        )
+        self._flight = SingleFlight()
+        self.coalesced = 0
+
+    @staticmethod
+    def key(query: str, num: int) -> str:
+        """Case-folded, NFKC-normalised, whitespace-collapsed query plus result count."""
+        return f"{num}:{normalize_text(query)}"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        return self._store.get(key)
+
+    def put(self, key: str, results: List[Dict[str, Any]]):
+        self._store.put(key, results)
+
+    async def _run_store(self, fn: Callable, *args):
+        if self._store.persistent:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def get_or_fetch(self, query: str, num: int,
+                           fetch: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Cached results for (query, num), calling `fetch` at most once for concurrent callers."""
+        key = self.key(query, num)
+        cached = await self._run_store(self.get, key)
+        if cached is not None:
+            return cached
+
+        async def fetch_and_store() -> List[Dict[str, Any]]:
+            results = await fetch()
+            await self._run_store(self.put, key, results)
+            return results
+
+        results, shared = await self._flight.run(key, fetch_and_store)
+        if shared:
+            self.coalesced += 1
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._store.stats(), "coalesced": self.coalesced}
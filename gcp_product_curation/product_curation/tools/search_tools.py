@@ -1,13 +1,22 @@
 # search_tools.py
 import os
 import json
-import httpx
-from bs4 import BeautifulSoup
+import asyncio
+import sqlite3
 from google.adk.tools.base_tool import BaseTool
 from google.genai import types
-from typing import Any
+from typing import Any, Optional
 from google.adk.tools.tool_context import ToolContext
 
+from product_curation import config
+from .html_extract import extract_async
+from .http_client import SharedHttpClient
+from .page_cache import PageCache
+from .passage_select import select_passages, truncate_text
+from .rate_limit import get_limiter
+from .tool_memo import SessionToolMemo
+from .search_cache import SearchCache
+
 API_KEY = os.environ.get("GOOGLE_API_KEY")
 SEARCH_ENGINE_ID = os.environ.get("GOOGLE_SEARCH_ENGINE_ID")
 
@@ -18,7 +27,8 @@ if not SEARCH_ENGINE_ID:
     print("Warning: GOOGLE_SEARCH_ENGINE_ID not set.")
 
 def _text_content_block(obj):
-    return {"type": "text", "text": json.dumps(obj, indent=2, ensure_ascii=False)}
+    # Compact separators: indentation only costs the model tokens
+    return {"type": "text", "text": json.dumps(obj, separators=(",", ":"), ensure_ascii=False)}
 
 
 
@@ -27,8 +37,17 @@ class SearchTool(BaseTool):
     name = "search"
     description = "Perform a web search query."
 
-    def __init__(self):
+    def __init__(self, http: Optional[SharedHttpClient] = None, cache: Optional[SearchCache] = None,
+                 memo: Optional[SessionToolMemo] = None):
         super().__init__(name=self.name, description=self.description)
+        self.http = http or SharedHttpClient()
+        self.memo = memo
+        # Identical searches from parallel agents share one API call; results are reused for the TTL
+        self.cache = cache or SearchCache(
+            ttl=config.SEARCH_CACHE_TTL,
+            max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+            path=config.SEARCH_CACHE_PATH,
+        )
 
     def _get_declaration(self) -> types.FunctionDeclaration:
         return types.FunctionDeclaration(
@@ -45,6 +64,8 @@ class SearchTool(BaseTool):
         )
 
     async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        if self.memo is not None:
+            return await self.memo.run(self.name, args, tool_context, lambda: self.execute(**args))
         return await self.execute(**args)
 
     async def execute(self, query: str, num: int = 5) -> dict:
@@ -59,29 +80,55 @@ class SearchTool(BaseTool):
     async def _call_google_search(self, query: str, num: int = 5) -> list[dict]:
         if not API_KEY or not SEARCH_ENGINE_ID:
             raise RuntimeError("Google API Key or Search Engine ID not configured.")
+        num = max(1, min(int(num), 10))
+        return await self.cache.get_or_fetch(query, num, lambda: self._fetch_google_search(query, num))
+
+    async def _fetch_google_search(self, query: str, num: int) -> list[dict]:
         params = {
             "key": API_KEY,
             "cx": SEARCH_ENGINE_ID,
             "q": query,
-            "num": max(1, min(int(num), 10)),
+            "num": num,
             "fields": "items(title,link,snippet)",
         }
         url = "https://www.googleapis.com/customsearch/v1"
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.get(url, params=params)
+
+        async def request():
+            resp = await self.http.get(url, params=params)
             resp.raise_for_status()
-            data = resp.json()
-            return [
-                {"title": it.get("title"), "link": it.get("link"), "snippet": it.get("snippet")}
-                for it in data.get("items", [])
-            ]
+            return resp
+
+        # Paced and retried (429/5xx) under the process-wide search API limit
+        data = (await get_limiter("search").call_async(request)).json()
+        return [
+            {"title": it.get("title"), "link": it.get("link"), "snippet": it.get("snippet")}
+            for it in data.get("items", [])
+        ]
 class ReadWebpageTool(BaseTool):
     """Reusable tool to fetch and extract text content from a webpage."""
     name = "read_webpage"
-    description = "Fetch and extract text content from a webpage."
+    description = (
+        "Fetch and extract text content from a webpage. Pass `query` (your question) to get only "
+        "the most relevant passages with links to their sections, and `max_tokens` to cap the size."
+    )
 
-    def __init__(self):
+    def __init__(self, http: Optional[SharedHttpClient] = None, cache: Optional[PageCache] = None,
+                 memo: Optional[SessionToolMemo] = None):
         super().__init__(name=self.name, description=self.description)
+        self.http = http or SharedHttpClient()
+        self.memo = memo
+        # Unchanged pages cost a 304 (or nothing while fresh) instead of a full fetch and parse
+        if cache is None and config.PAGE_CACHE_PATH:
+            try:
+                cache = PageCache(
+                    config.PAGE_CACHE_PATH,
+                    max_bytes=config.PAGE_CACHE_MAX_BYTES,
+                    fresh_ttl=config.PAGE_CACHE_FRESH_TTL,
+                )
+            except (OSError, sqlite3.Error) as e:
+                # e.g. read-only or HOME-less container filesystem: run without the cache
+                print(f"⚠️ Page cache disabled, cannot open {config.PAGE_CACHE_PATH}: {e}")
+        self.cache = cache
 
     def _get_declaration(self) -> types.FunctionDeclaration:
         return types.FunctionDeclaration(
@@ -90,30 +137,72 @@ class ReadWebpageTool(BaseTool):
             parameters=types.Schema(
                 type=types.Type.OBJECT,
                 properties={
-                    "url": types.Schema(type=types.Type.STRING, description="The URL of the webpage to fetch")
+                    "url": types.Schema(type=types.Type.STRING, description="The URL of the webpage to fetch"),
+                    "query": types.Schema(type=types.Type.STRING,
+                                          description="Optional question; returns only the passages that answer it"),
+                    "max_tokens": types.Schema(type=types.Type.INTEGER,
+                                               description="Optional cap on the size of the returned text, in tokens"),
                 },
                 required=["url"]
             )
         )
 
     async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        if self.memo is not None:
+            return await self.memo.run(self.name, args, tool_context, lambda: self.execute(**args))
         return await self.execute(**args)
 
-    async def execute(self, url: str) -> dict:
+    async def execute(self, url: str, query: Optional[str] = None, max_tokens: Optional[int] = None) -> dict:
         if not url:
             return {"content": [{"type": "text", "text": "Invalid URL"}], "isError": True}
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.get(url)
-                resp.raise_for_status()
-                html = resp.text
+            content = await self._fetch_content(url)
         except Exception as e:
             return {"content": [{"type": "text", "text": f"Webpage fetch error: {e}"}], "isError": True}
-
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        title = soup.title.string.strip() if soup.title and soup.title.string else ""
-        body_text = " ".join(soup.get_text(separator=" ", strip=True).split())
-        content = {"title": title, "text": body_text, "url": url}
-        return {"content": [_text_content_block(content)]}
\ No newline at end of file
+        return await self._render(content, url, query, max_tokens)
+
+    async def _render(self, content: dict, url: str, query: Optional[str] = None,
+                      max_tokens: Optional[int] = None) -> dict:
+        """Tool result for extracted page content: selected passages for `query`, else the text."""
+        if query:
+            budget = int(max_tokens or config.READ_WEBPAGE_QUERY_MAX_TOKENS)
+            passages = await asyncio.to_thread(select_passages, content, query, budget)
+            result = {"title": content.get("title"), "url": url, "passages": passages}
+        else:
+            result = {k: content.get(k) for k in ("title", "text", "url")}
+            cut = truncate_text(result["text"] or "", int(max_tokens)) if max_tokens else None
+            if cut is not None:
+                result["text"], result["clipped"] = cut, True
+        if content.get("truncated"):
+            result["truncated"] = True  # page exceeded READ_WEBPAGE_MAX_BYTES
+        return {"content": [_text_content_block(result)]}
+
+    async def _fetch_content(self, url: str) -> dict:
+        """Extracted page content, served from / revalidated against the page cache when enabled."""
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        if cached is not None and self.cache.is_fresh(cached):
+            self.cache.record_hit()
+            return cached.content
+
+        # Streamed with a byte cap; binary downloads (PDFs etc.) are refused before the body is read
+        fetched = await get_limiter("web").call_async(lambda: self.http.fetch_text(
+            url,
+            max_bytes=config.READ_WEBPAGE_MAX_BYTES,
+            content_types=config.READ_WEBPAGE_CONTENT_TYPES,
+            headers=PageCache.validators(cached),
+        ))
+        if fetched.status_code == 304 and cached is not None:
+            await asyncio.to_thread(self.cache.mark_revalidated, url)
+            return cached.content
+        html = fetched.text
+
+        # Parsing is CPU-bound: keep it off the event loop shared by the parallel agents
+        content = await extract_async(html, url)
+        if fetched.truncated:
+            content["truncated"] = True
+        if self.cache:
+            await asyncio.to_thread(
+                self.cache.put, url, html, content,
+                fetched.headers.get("ETag"), fetched.headers.get("Last-Modified"),
+            )
+        return content
@@ -0,0 +1,51 @@
+# single_flight.py
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls: while a call for `key` is in flight on
+    the running loop, other callers with the same key await its outcome instead of
+    starting their own. Results and exceptions are shared; a cancelled leader is not
+    (its waiters retry, and one of them becomes the new leader).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Return (result, shared); `shared` is True when another caller's call produced it."""
+        loop = asyncio.get_running_loop()
+        while True:
+            future = self._inflight.get(key)
+            if future is None or future.get_loop() is not loop:
+                break
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled
+                # The leading caller was cancelled; retry (possibly becoming the leader)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,96 @@
+# tool_memo.py
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from google.adk.tools.tool_context import ToolContext
+
+from .cache_store import normalize_text
+from .single_flight import SingleFlight
+
+STATE_PREFIX = "tool_memo:"
+STATS_KEY = "tool_memo_stats"
+
+
+def _normalize_url(url: str) -> str:
+    """Lower-case scheme/host and drop the fragment (same document); path and query are kept."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def _normalize_arg(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        if name == "url":
+            return _normalize_url(value)
+        return normalize_text(value)
+    return value
+
+
+def _session_id(tool_context: ToolContext) -> str:
+    session = getattr(tool_context, "session", None) or tool_context._invocation_context.session
+    return session.id
+
+
+class SessionToolMemo:
+    """
+    Session-scoped memo of tool results, shared by every agent in a curation session.
+
+    Results are stored in session state (one `tool_memo:<hash>` key per call, keyed by tool
+    name and normalised arguments) so a repeated search or page read by another sub-agent
+    returns instantly. Concurrent identical calls within the process are coalesced into one.
+    Failed calls (isError) are not memoised. Per-session counters are kept in
+    `tool_memo_stats` in state and via `stats()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def key(tool_name: str, args: Dict[str, Any]) -> str:
+        normalized = {k: _normalize_arg(k, v) for k, v in args.items() if v is not None}
+        payload = json.dumps([tool_name, normalized], sort_keys=True, ensure_ascii=False, default=str)
+        return STATE_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+    def _count(self, tool_context: ToolContext, session_id: str, **deltas: float):
+        with self._lock:
+            stats = self._stats.setdefault(session_id, {"calls": 0, "hits": 0, "coalesced": 0, "saved_seconds": 0.0})
+            for name, delta in deltas.items():
+                stats[name] += delta
+            snapshot = {**stats, "saved_seconds": round(stats["saved_seconds"], 3)}
+        tool_context.state[STATS_KEY] = snapshot
+
+    async def run(self, tool_name: str, args: Dict[str, Any], tool_context: ToolContext,
+                  call: Callable[[], Awaitable[Any]]) -> Any:
+        key = self.key(tool_name, args)
+        session_id = _session_id(tool_context)
+
+        entry = tool_context.state.get(key)
+        if entry is not None:
+            self._count(tool_context, session_id, calls=1, hits=1, saved_seconds=entry.get("elapsed", 0.0))
+            return entry["result"]
+
+        async def call_and_store() -> Tuple[Any, float]:
+            started = time.perf_counter()
+            result = await call()
+            elapsed = time.perf_counter() - started
+            if not (isinstance(result, dict) and result.get("isError")):
+                tool_context.state[key] = {"tool": tool_name, "result": result, "elapsed": round(elapsed, 3)}
+            return result, elapsed
+
+        (result, elapsed), shared = await self._flight.run((session_id, key), call_and_store)
+        if shared:
+            self._count(tool_context, session_id, calls=1, coalesced=1, saved_seconds=elapsed)
+        else:
+            self._count(tool_context, session_id, calls=1)
+        return result
+
+    def stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            if session_id is not None:
+                return dict(self._stats.get(session_id, {}))
+            return {sid: dict(s) for sid, s in self._stats.items()}
@@ -0,0 +1,90 @@
+# vector_codec.py
+"""
+Compact encodings for pgvector values.
+
+- `to_float32` keeps embeddings as packed float32 buffers (what pgvector stores anyway).
+- `vector_param` renders a query vector once, with just enough digits to round-trip float32.
+- `copy_binary` builds a PostgreSQL binary COPY payload, so bulk inserts ship raw float32
+  vectors (pgvector's binary `vector_recv` format) instead of text literals.
+"""
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional, Sequence
+
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
+_NULL = struct.pack("!i", -1)
+_TEXT_OID = 25
+
+
+def to_float32(values: Sequence[float]) -> array:
+    """Return `values` as a packed float32 array (no copy if it already is one)."""
+    if isinstance(values, array) and values.typecode == "f":
+        return values
+    return array("f", values)
+
+
+def vector_param(values: Sequence[float]) -> str:
+    """
+    Text form of a vector for a bound query parameter. pg8000 only sends parameters
+    in text format, so use the shortest float32-exact rendering (9 significant digits).
+    """
+    return "[" + ",".join(map("{:.9g}".format, to_float32(values))) + "]"
+
+
+# --- Binary COPY field encoders ---
+
+def _encode_int4(value: int) -> bytes:
+    return struct.pack("!ii", 4, value)
+
+
+def _encode_text(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return struct.pack("!i", len(data)) + data
+
+
+def _encode_text_array(values: List[Optional[str]]) -> bytes:
+    has_null = any(v is None for v in values)
+    if not values:
+        body = struct.pack("!iii", 0, 0, _TEXT_OID)
+    else:
+        parts = [struct.pack("!iiiii", 1, int(has_null), _TEXT_OID, len(values), 1)]
+        for v in values:
+            parts.append(_NULL if v is None else _encode_text(v))
+        body = b"".join(parts)
+    return struct.pack("!i", len(body)) + body
+
+
+def _encode_vector(values: Sequence[float]) -> bytes:
+    vec = to_float32(values)
+    if vec.itemsize != 4:
+        raise ValueError("float32 array expected")
+    # pgvector binary format: int16 dim, int16 unused, dim x big-endian float4
+    body = struct.pack("!hh", len(vec), 0)
+    if sys.byteorder == "little":
+        vec = array("f", vec)
+        vec.byteswap()
+    body += vec.tobytes()
+    return struct.pack("!i", len(body)) + body
+
+
+_ENCODERS = {
+    "int4": _encode_int4,
+    "text": _encode_text,
+    "text[]": _encode_text_array,
+    "vector": _encode_vector,
+}
+
+
+def copy_binary(rows: Iterable[Sequence], column_types: Sequence[str]) -> bytes:
+    """Encode rows as a `COPY ... FROM STDIN WITH (FORMAT binary)` payload."""
+    encoders = [_ENCODERS[t] for t in column_types]
+    field_count = struct.pack("!h", len(encoders))
+    parts = [_COPY_HEADER]
+    for row in rows:
+        parts.append(field_count)
+        for encode, value in zip(encoders, row):
+            parts.append(_NULL if value is None else encode(value))
+    parts.append(_COPY_TRAILER)
+    return b"".join(parts)
@@ -0,0 +1,30 @@
+# test_cache_store.py
+import sqlite3
+
+from product_curation.tools.cache_store import LruTtlStore, normalize_text
+
+
+def _disk_keys(path):
+    with sqlite3.connect(path) as db:
+        return sorted(k for (k,) in db.execute("SELECT key FROM entries"))
+
+
+def test_disk_tier_is_trimmed_to_max_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    store = LruTtlStore(max_entries=2, path=path)
+    for key in ("a", "b", "c"):
+        store.put(key, key.upper())
+    assert _disk_keys(path) == ["b", "c"]
+    assert LruTtlStore(max_entries=2, path=path).get("c") == "C"
+
+
+def test_expired_rows_are_deleted(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    store = LruTtlStore(max_entries=10, ttl=-1, path=path)  # everything is already expired
+    store.put("a", "A")
+    assert store.get("a") is None
+    assert _disk_keys(path) == []
+
+
+def test_normalize_text():
+    assert normalize_text("  CMEK Policy\n") == "cmek policy"
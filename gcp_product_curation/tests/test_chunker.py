@@ -0,0 +1,37 @@
+# test_chunker.py
+from product_curation.tools.chunker import iter_chunks, iter_sections, titled_text
+
+
+def test_short_statements_without_body_are_kept():
+    text = "Encryption\nAll buckets must use CMEK\nNever expose public IPs\nNetworking\nUse PSC where possible."
+    chunks = list(iter_chunks(text.splitlines()))
+    joined = " ".join(c.text for c in chunks)
+    assert "All buckets must use CMEK" in joined
+    assert "Never expose public IPs" in joined
+    assert chunks[-1].section_title == "Networking"
+    assert chunks[-1].text == "Use PSC where possible."
+
+
+def test_heading_followed_by_body():
+    lines = ["# Storage", "Use regional buckets.", "", "Key Management", "", "Rotate keys every 90 days."]
+    assert list(iter_sections(lines)) == [
+        ("Storage", "Use regional buckets."),
+        ("Key Management", "Rotate keys every 90 days."),
+    ]
+
+
+def test_trailing_short_line_is_body_text():
+    assert list(iter_sections(["Intro text here.", "Done"])) == [(None, "Intro text here. Done")]
+
+
+def test_titled_text():
+    assert titled_text("Rotate keys.", "Key Management") == "Key Management\nRotate keys."
+    assert titled_text("Rotate keys.", None) == "Rotate keys."
+
+
+def test_long_paragraph_is_buffered_in_pieces():
+    lines = ["Intro", *[f"Rule {i} applies to every project." for i in range(50)]]
+    pieces = list(iter_sections(lines, max_paragraph_chars=200))
+    assert len(pieces) > 1
+    assert all(title == "Intro" and len(text) < 300 for title, text in pieces)
+    assert " ".join(text for _, text in pieces) == " ".join(lines[1:])
@@ -0,0 +1,26 @@
+# test_embedding_batcher.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from product_curation.tools.embedding_batcher import EmbeddingBatcher
+
+
+def _embed_all(batcher, texts):
+    with ThreadPoolExecutor(len(texts)) as pool:
+        return [pool.submit(batcher.embed, t, 5) for t in texts]
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+    batcher = EmbeddingBatcher(lambda texts: calls.append(texts) or [[float(len(t))] for t in texts], window=0.05)
+    futures = _embed_all(batcher, ["a", "bb", "a"])
+    assert [f.result() for f in futures] == [[1.0], [2.0], [1.0]]
+    assert len(calls) == 1 and sorted(calls[0]) == ["a", "bb"]
+
+
+def test_short_response_fails_every_caller():
+    batcher = EmbeddingBatcher(lambda texts: [[0.0]] * (len(texts) - 1), window=0.05)
+    for future in _embed_all(batcher, ["a", "b", "c"]):
+        with pytest.raises(RuntimeError, match="returned 2 vectors for 3 texts"):
+            future.result()
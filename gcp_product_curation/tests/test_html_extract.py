@@ -0,0 +1,39 @@
+# test_html_extract.py
+import pytest
+
+from product_curation.tools.html_extract import _MODULES, get_extractor
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>AlloyDB overview</title><script>var x = 1;</script></head>
+<body>
+<nav>Docs home</nav>
+<main>
+<p>AlloyDB is a fully managed PostgreSQL-compatible database service for demanding workloads,
+offering high performance, availability and scale for transactional and analytical queries.</p>
+<h1 id="cmek">Customer-managed encryption keys</h1>
+<p>Clusters can be encrypted with CMEK.</p>
+<h2 id="psc">Private Service Connect</h2>
+<p>Use PSC where possible.</p>
+</main>
+<footer>Terms</footer>
+</body></html>"""
+
+
+@pytest.mark.parametrize("name", ["selectolax", "lxml", "bs4", "legacy"])
+def test_extractor_with_headings(name):
+    pytest.importorskip(_MODULES[name])
+    content = get_extractor(name)(PAGE, "https://cloud.google.com/alloydb/docs/overview")
+
+    assert content["title"] == "AlloyDB overview"
+    assert "Clusters can be encrypted with CMEK." in content["text"]
+    assert "var x" not in content["text"]
+    if name == "legacy":
+        return  # whole-body baseline: no sections, keeps navigation
+    assert "Docs home" not in content["text"]
+    assert [(s["heading"], s["anchor"]) for s in content["sections"]] == [
+        (None, None),
+        ("Customer-managed encryption keys", "cmek"),
+        ("Private Service Connect", "psc"),
+    ]
+    assert content["sections"][2]["text"] == "Use PSC where possible."
+    assert "\ue000" not in content["text"]  # no marker left behind
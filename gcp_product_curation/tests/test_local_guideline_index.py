@@ -0,0 +1,20 @@
+# test_local_guideline_index.py
+import pytest
+
+pytest.importorskip("numpy")
+
+from product_curation.tools.local_guideline_index import LocalGuidelineIndex
+
+
+def test_build_streams_rows_and_round_trips(tmp_path):
+    rows = (
+        ("policy.md", i, "security", ["cmek"], f"chunk {i}", "Encryption", [float(i == j) * 3 for j in range(3)])
+        for i in range(3)
+    )
+    assert LocalGuidelineIndex.build(str(tmp_path), rows, model="m", dim=3) == 3
+
+    index = LocalGuidelineIndex(str(tmp_path))
+    assert (index.model, index.dim, len(index.chunks)) == ("m", 3, 3)
+    hits = index.search([0.0, 1.0, 0.0], top_k=1)
+    assert hits[0]["text_content"] == "chunk 1"
+    assert hits[0]["similarity"] == pytest.approx(1.0)
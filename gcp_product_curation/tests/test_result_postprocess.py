@@ -0,0 +1,19 @@
+# test_result_postprocess.py
+from product_curation.tools.result_postprocess import merge_adjacent
+
+
+def _hit(idx, title, text):
+    return {"document_name": "policy.md", "chunk_index": idx, "section_title": title,
+            "text_content": text, "similarity": 0.5}
+
+
+def test_merge_adjacent_stays_within_a_section():
+    merged = merge_adjacent([
+        _hit(0, "Encryption", "Use CMEK keys."),
+        _hit(1, "Networking", "Use PSC where"),
+        _hit(2, "Networking", "PSC where possible."),
+    ])
+    assert [(m["section_title"], m["text_content"]) for m in merged] == [
+        ("Encryption", "Use CMEK keys."),
+        ("Networking", "Use PSC where possible."),
+    ]